@@ -0,0 +1,247 @@
+# Copyright 2016 Cedric Mesnil <cedric.mesnil@ubinity.com>, Ubinity SAS
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""asyncio front-end for the ecpy signers.
+
+:class:`ECDSA`, :class:`EDDSA`, :class:`ECSchnorr` and :class:`Borromean`
+take the same arguments as their synchronous counterparts, plus:
+
+  - `executor`: where the computation runs. None uses the event loop
+    default thread pool. A :class:`concurrent.futures.ProcessPoolExecutor`
+    (see :func:`ecpy.parallel.make_pool`) also gives multi-core throughput,
+    keys are then sent by curve name as in :mod:`ecpy.parallel`.
+  - `concurrency`: maximum number of operations submitted to the executor
+    at once, None for no limit.
+
+Cancelling an awaiting coroutine releases its concurrency slot at once.
+A call which has not started yet is withdrawn from the executor. A call
+which is already running completes in the background and its result is
+dropped.
+
+Threads do not add throughput, as the arithmetic holds the GIL, and the
+event loop still has to win the GIL back from them (see
+:func:`sys.setswitchinterval`). Use a process pool for latency sensitive
+services: the loop then only pays for pickling the arguments.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+import ecpy.ecdsa
+import ecpy.eddsa
+import ecpy.ecschnorr
+import ecpy.borromean
+from ecpy.keys import ECPublicKey, ECPrivateKey
+from ecpy.parallel import _pack_key, _unpack_key
+
+
+class _PackedKey(object):
+    __slots__ = ('k',)
+
+    def __init__(self, k):
+        self.k = k
+
+def _pack(obj):
+    if isinstance(obj, (ECPublicKey, ECPrivateKey)):
+        return _PackedKey(_pack_key(obj))
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_pack(o) for o in obj)
+    return obj
+
+def _unpack(obj):
+    if isinstance(obj, _PackedKey):
+        return _unpack_key(obj.k)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_unpack(o) for o in obj)
+    return obj
+
+def _call_packed(signer, method, args):
+    return getattr(signer, method)(*_unpack(args))
+
+
+class _AsyncSigner(object):
+    _signer_class = None
+
+    def __init__(self, *args, executor=None, concurrency=None, **kwargs):
+        self.signer = self._signer_class(*args, **kwargs)
+        self.executor = executor
+        self._process = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+        self._concurrency = concurrency
+        self._sem = None
+
+    async def _run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        if self._process:
+            fn = functools.partial(_call_packed, self.signer, method, _pack(args))
+        else:
+            fn = functools.partial(getattr(self.signer, method), *args)
+        if self._concurrency is None:
+            return await loop.run_in_executor(self.executor, fn)
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._concurrency)
+        async with self._sem:
+            return await loop.run_in_executor(self.executor, fn)
+
+
+class ECDSA(_AsyncSigner):
+    """Asynchronous :class:`ecpy.ecdsa.ECDSA`.
+
+    Args:
+        fmt (str) : in/out signature format. See :mod:`ecpy.formatters`
+        executor (Executor): where signatures are computed, default to threads
+        concurrency (int): maximum number of pending computations
+    """
+    _signer_class = ecpy.ecdsa.ECDSA
+
+    async def sign(self, msg, pv_key, canonical=False):
+        """ See :meth:`ecpy.ecdsa.ECDSA.sign` """
+        return await self._run('sign', msg, pv_key, canonical)
+
+    async def sign_rfc6979(self, msg, pv_key, hasher, canonical=False):
+        """ See :meth:`ecpy.ecdsa.ECDSA.sign_rfc6979` """
+        return await self._run('sign_rfc6979', msg, pv_key, hasher, canonical)
+
+    async def sign_k(self, msg, pv_key, k, canonical=False):
+        """ See :meth:`ecpy.ecdsa.ECDSA.sign_k` """
+        return await self._run('sign_k', msg, pv_key, k, canonical)
+
+    async def verify(self, msg, sig, pu_key):
+        """ See :meth:`ecpy.ecdsa.ECDSA.verify` """
+        return await self._run('verify', msg, sig, pu_key)
+
+
+class EDDSA(_AsyncSigner):
+    """Asynchronous :class:`ecpy.eddsa.EDDSA`.
+
+    Args:
+      hasher (hashlib): callable constructor returning an object with update(), digest() interface. Example: hashlib.sha256,  hashlib.sha512...
+      fmt (str): in/out signature format. See  :mod:`ecpy.formatters`.
+      executor (Executor): where signatures are computed, default to threads
+      concurrency (int): maximum number of pending computations
+    """
+    _signer_class = ecpy.eddsa.EDDSA
+
+    get_public_key = staticmethod(ecpy.eddsa.EDDSA.get_public_key)
+
+    async def sign(self, msg, pv_key):
+        """ See :meth:`ecpy.eddsa.EDDSA.sign` """
+        return await self._run('sign', msg, pv_key)
+
+    async def verify(self, msg, sig, pu_key, cofactored=False):
+        """ See :meth:`ecpy.eddsa.EDDSA.verify` """
+        return await self._run('verify', msg, sig, pu_key, cofactored)
+
+
+class ECSchnorr(_AsyncSigner):
+    """Asynchronous :class:`ecpy.ecschnorr.ECSchnorr`.
+
+    Args:
+      hasher (hashlib): callable constructor returning an object with update(), digest() interface. Example: hashlib.sha256,  hashlib.sha512...
+      option (str): one of "ISO","ISOx","BSI","LIBSECP","Z","SECP256K1"
+      fmt (str): in/out signature format. See  :mod:`ecpy.formatters`
+      executor (Executor): where signatures are computed, default to threads
+      concurrency (int): maximum number of pending computations
+    """
+    _signer_class = ecpy.ecschnorr.ECSchnorr
+
+    async def sign(self, msg, pv_key):
+        """ See :meth:`ecpy.ecschnorr.ECSchnorr.sign` """
+        return await self._run('sign', msg, pv_key)
+
+    async def sign_k(self, msg, pv_key, k):
+        """ See :meth:`ecpy.ecschnorr.ECSchnorr.sign_k` """
+        return await self._run('sign_k', msg, pv_key, k)
+
+    async def sign_rfc6979(self, msg, pv_key, hasher=None, canonical=False):
+        """ See :meth:`ecpy.ecschnorr.ECSchnorr.sign_rfc6979` """
+        return await self._run('sign_rfc6979', msg, pv_key, hasher, canonical)
+
+    async def sign_secp256k1(self, msg, pv_key, algo16=b""):
+        """ See :meth:`ecpy.ecschnorr.ECSchnorr.sign_secp256k1` """
+        return await self._run('sign_secp256k1', msg, pv_key, algo16)
+
+    async def verify(self, msg, sig, pu_key):
+        """ See :meth:`ecpy.ecschnorr.ECSchnorr.verify` """
+        return await self._run('verify', msg, sig, pu_key)
+
+
+class Borromean(_AsyncSigner):
+    """Asynchronous :class:`ecpy.borromean.Borromean`.
+
+    Args:
+        fmt (str) : in/out signature format. See :mod:`ecpy.formatters`. IGNORED.
+        executor (Executor): where signatures are computed, default to threads
+        concurrency (int): maximum number of pending computations
+    """
+    _signer_class = ecpy.borromean.Borromean
+
+    async def sign(self, msg, rings, pv_keys, pv_keys_index):
+        """ See :meth:`ecpy.borromean.Borromean.sign` """
+        return await self._run('sign', msg, rings, pv_keys, pv_keys_index)
+
+    async def verify(self, msg, sig, rings):
+        """ See :meth:`ecpy.borromean.Borromean.verify` """
+        return await self._run('verify', msg, sig, rings)
+
+
+if __name__ == "__main__":
+    import hashlib
+    import random
+    from ecpy.curves import Curve
+    from ecpy.parallel import make_pool
+
+    async def main(pool):
+        cv = Curve.get_curve('secp256k1')
+        pv = [ECPrivateKey(random.randrange(1,cv.order), cv) for i in range(6)]
+        pu = [k.get_public_key() for k in pv]
+        msgs = [hashlib.sha256(b'msg %d'%i).digest() for i in range(6)]
+
+        for executor in (None, pool):
+            for signer in (ECDSA(executor=executor, concurrency=2),
+                           ECSchnorr(hashlib.sha256, executor=executor)):
+                sigs = await asyncio.gather(*[signer.sign(m,k) for m,k in zip(msgs,pv)])
+                ok = await asyncio.gather(*[signer.verify(m,s,k) for m,s,k in zip(msgs,sigs,pu)])
+                assert all(ok)
+                assert not await signer.verify(msgs[0], sigs[1], pu[0])
+                assert signer.signer.verify(msgs[2], sigs[2], pu[2])
+
+            cv = Curve.get_curve('Ed25519')
+            signer = EDDSA(hashlib.sha512, executor=executor)
+            k = ECPrivateKey(0x4ccd089b28ff96da9db6c346ec114e0f5b8a319f35aba624da8cf6ed4fb8a6fb, cv)
+            sig = await signer.sign(b'\x72', k)
+            assert sig == ecpy.eddsa.EDDSA(hashlib.sha512).sign(b'\x72', k)
+            assert await signer.verify(b'\x72', sig, EDDSA.get_public_key(k))
+            assert await signer.verify(b'\x72', sig, EDDSA.get_public_key(k), True)
+            assert not await signer.verify(b'\x73', sig, EDDSA.get_public_key(k), True)
+
+        # cancellation releases the slots
+        signer = ECDSA(concurrency=1)
+        sigs = [signer.signer.sign(m,k) for m,k in zip(msgs,pv)]
+        tasks = [asyncio.ensure_future(signer.verify(m,s,k))
+                 for m,s,k in zip(msgs,sigs,pu)]
+        await asyncio.sleep(0)
+        for t in tasks[1:4]:
+            t.cancel()
+        res = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, asyncio.CancelledError) for r in res[1:4])
+        assert res[0] is True and res[4] is True and res[5] is True
+        assert await signer.verify(msgs[0], sigs[0], pu[0])
+
+    try:
+        with make_pool(2) as pool:
+            asyncio.run(main(pool))
+        print("All internal assert OK!")
+    finally:
+        pass
@@ -0,0 +1,168 @@
+# Copyright 2016 Cedric Mesnil <cedric.mesnil@ubinity.com>, Ubinity SAS
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batch verification helpers.
+
+Signers providing batch verification expose a `verify_batch(items)`
+method taking a list of `(msg, sig, pu_key)` tuples, possibly followed by
+signer specific hints such as the ECDSA recovery id, and returning one
+boolean per item: the one `verify` returns in the same mode, both
+methods having the same default mode. For a given item, the result never depends on the other items of the batch.
+:func:`batch_verify` is the common driver they are built on: the signer
+only gives the equation of one signature.
+
+:class:`ecpy.coalescer.VerificationCoalescer` turns many concurrent single
+`verify` calls into such batches.
+"""
+
+#python 2 compatibility
+from builtins import int,pow
+
+import random
+
+_sysrand = random.SystemRandom()
+
+def bisect_batch(items, check, verify):
+    """ Returns the per item results of a batch verification.
+
+    The whole batch is checked first. A failing (sub-)batch is split in
+    two halves, down to single items which are verified alone.
+
+    Args:
+        items (list):       items to verify
+        check (callable):   check(sub_items) -> bool, True if all valid
+        verify (callable):  verify(item) -> bool, single item verification
+
+    Returns:
+        list: one boolean per item
+    """
+    res = [False]*len(items)
+    todo = [(0, len(items))]
+    while todo:
+        lo, hi = todo.pop()
+        if hi - lo == 1:
+            res[lo] = verify(items[lo])
+        elif check(items[lo:hi]):
+            res[lo:hi] = [True]*(hi-lo)
+        else:
+            mid = (lo+hi)//2
+            todo.append((mid,hi))
+            todo.append((lo,mid))
+    return res
+
+def combined_check(curve, terms, equation):
+    """ Checks the equations of several signatures at once.
+
+    The equations are combined with random 128 bits weights z_i (z_0 = 1),
+    the scalars of a same point being merged, and the combination is
+    checked with :func:`ecpy.curves.Curve.multi_mul_is_zero`. Scalars are
+    reduced modulo cofactor*order, so that points with a small order
+    component are handled exactly.
+
+    Args:
+        curve (ecpy.curves.Curve): curve of all terms
+        terms (list):       signer specific terms
+        equation (callable): equation(term) -> list of (scalar, point) pairs
+                             whose sum is zero for a valid signature
+
+    Returns:
+        boolean: True if the combination is zero
+    """
+    m = curve.cofactor*curve.order
+    coefs = {}
+    z = 1
+    for t in terms:
+        for k,P in equation(t):
+            coefs[P] = coefs.get(P,0) + z*k
+        z = _sysrand.getrandbits(128) or 1
+    points = list(coefs)
+    return curve.multi_mul_is_zero([coefs[P]%m for P in points], points)
+
+def batch_verify(items, term, equation, verify):
+    """ Verifies a batch of signatures.
+
+    Items are grouped by curve. Each group is checked with
+    :func:`combined_check` and bisected with :func:`bisect_batch` if the
+    check fails.
+
+    Args:
+        items (list):        signer items, see `verify_batch`
+        term (callable):     term(item) -> (curve, ...) tuple, or None for
+                             an item to verify alone
+        equation (callable): see :func:`combined_check`
+        verify (callable):   verify(item) -> bool, single item verification
+
+    Returns:
+        list: one boolean per item
+    """
+    res = [None]*len(items)
+    groups = {}
+    for i,item in enumerate(items):
+        t = term(item)
+        if t is None:
+            res[i] = verify(item)
+        else:
+            groups.setdefault(t[0].name, []).append((i,t))
+    for terms in groups.values():
+        curve = terms[0][1][0]
+        ok = bisect_batch(terms,
+                          lambda sub: combined_check(curve, [t for i,t in sub], equation),
+                          lambda it: verify(items[it[0]]))
+        for (i,t),v in zip(terms,ok):
+            res[i] = v
+    return res
+
+
+if __name__ == "__main__":
+    from ecpy.curves import Curve
+
+    try:
+        items = list(range(37))
+        bad = set([3, 4, 20, 36])
+        calls = []
+        def check(sub):
+            calls.append(len(sub))
+            return not bad.intersection(sub)
+        res = bisect_batch(items, check, lambda i: i not in bad)
+        assert res == [i not in bad for i in items]
+        assert bisect_batch(items, lambda sub: True, None) == [True]*37
+        assert bisect_batch([], check, None) == []
+
+        # items (k, P, curve name): valid if P = k*G, None items verified alone
+        def term(item):
+            if item[1] is None:
+                return None
+            return (Curve.get_curve(item[2]),)+item[:2]
+        def equation(t):
+            return [(t[1],t[0].generator), (-1,t[2])]
+        def verify(item):
+            return item[1] is not None and item[1] == item[0]*Curve.get_curve(item[2]).generator
+        items = []
+        for name in ('secp256k1','Ed25519'):
+            G = Curve.get_curve(name).generator
+            items += [(k, k*G, name) for k in range(3,10)]
+        items[2] = (items[2][0], items[3][1], items[2][2])
+        items[9] = (items[9][0], None, items[9][2])
+        items[11] = (items[11][0], -items[11][1], items[11][2])
+        expect = [verify(it) for it in items]
+        assert expect.count(False) == 3
+        assert batch_verify(items, term, equation, verify) == expect
+        assert batch_verify([], term, equation, verify) == []
+        cv = Curve.get_curve('Ed25519')
+        assert combined_check(cv, [term(it) for it in items[7:9]], equation)
+        assert not combined_check(cv, [term(it) for it in items[10:12]], equation)
+
+        print("All internal assert OK!")
+    finally:
+        pass
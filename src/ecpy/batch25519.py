@@ -0,0 +1,350 @@
+# Copyright 2016 Cedric Mesnil <cedric.mesnil@ubinity.com>, Ubinity SAS
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Batch X25519 and Ed25519 verification over NumPy lanes
+
+Field elements of 2^255-19 are held as 10 signed limbs in radix 2^25.5
+(26,25,26,... bits), one NumPy int64 column per lane, and the group
+formulas are evaluated in lockstep over all lanes.
+
+Results are the same as the ones of the scalar path. NumPy is optional:
+without it, both functions loop over the scalar path.
+
+"""
+
+#python 2 compatibility
+from builtins import int,pow
+
+import hashlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ecpy.curves import Curve, ECPyException, inv_mod, _trusted_point
+from ecpy.formatters import decode_sig
+
+_P = 2**255-19
+_OFFSETS = (0,26,51,77,102,128,153,179,204,230)
+
+#lanes processed at once, larger blocks fall out of CPU caches
+LANES = 2048
+
+if numpy is not None:
+    _BITS = numpy.array([26,25]*5, dtype=numpy.int64).reshape(10,1)
+    _MASK = (numpy.int64(1)<<_BITS)-1
+    _ODD2 = numpy.array([0,1]*10, dtype=numpy.int64).reshape(20,1)
+
+
+def _fe(values):
+    """ ints -> (10,N) limbs """
+    a = numpy.empty((10,len(values)), dtype=numpy.int64)
+    for n,v in enumerate(values):
+        v = v%_P
+        for i in range(10):
+            bits = 25 if i&1 else 26
+            a[i,n] = v & ((1<<bits)-1)
+            v >>= bits
+    return a
+
+def _fe_const(v, n):
+    return numpy.repeat(_fe([v]), n, axis=1)
+
+def _ints(a):
+    """ (10,N) limbs -> ints """
+    return [sum(int(l)<<o for l,o in zip(col,_OFFSETS))%_P
+            for col in a.T.tolist()]
+
+def _bytes(ks, nbits):
+    """ ints -> (N,nbytes) little endian uint8, to extract per lane bits """
+    nbytes = (nbits+7)//8
+    return numpy.frombuffer(b''.join(k.to_bytes(nbytes,'little') for k in ks),
+                            dtype=numpy.uint8).reshape(len(ks),nbytes)
+
+def _digit(kb, t, w):
+    """ w-bit digit at position t of each lane, t%w == 0 and w|8 """
+    return (kb[:,t>>3]>>(t&7)) & ((1<<w)-1)
+
+def _carry(h):
+    c = h>>_BITS
+    h &= _MASK
+    h[1:] += c[:-1]
+    h[0] += 19*c[9]
+    return h
+
+def _mul(f, g):
+    """ f*g, inputs limbs being at most 2^27 in absolute value """
+    gg  = numpy.concatenate((19*g,g))
+    ggd = gg<<_ODD2
+    h = f[0]*g
+    for i in range(1,10):
+        src = ggd if i&1 else gg
+        h += f[i]*src[10-i:20-i]
+    return _carry(_carry(h))
+
+def _sq(f):
+    return _mul(f,f)
+
+def _mul_small(f, c):
+    return _carry(_carry(f*c))
+
+
+def x25519_many(scalars, points, lanes=None):
+    """ Computes k_i*P_i on Curve25519 for many pairs at once.
+
+    Same as [Curve25519.mul_point(k,P) for k,P in zip(scalars,points)]:
+    scalars are used as given, clamping with
+    :func:`ecpy.curves.decode_scalar_25519` is up to the caller.
+
+    Args:
+        scalars (int[])  : scalars
+        points (Point[]) : Curve25519 points
+        lanes (int)      : lanes per NumPy block, default to LANES
+
+    Returns:
+        Point[]: k_i*P_i
+    """
+    if len(scalars) != len(points):
+        raise ECPyException("x25519_many: scalars and points length mismatch")
+    curve = Curve.get_curve('Curve25519')
+    if numpy is None:
+        return [curve.mul_point(k,P) for k,P in zip(scalars,points)]
+    lanes = lanes or LANES
+    res = []
+    for i in range(0, len(scalars), lanes):
+        us = [P.x for P in points[i:i+lanes]]
+        xs = _x25519_lanes(scalars[i:i+lanes], us, curve.a24)
+        res.extend(_trusted_point(x,None,curve) for x in xs)
+    return res
+
+def _x25519_lanes(ks, us, a24):
+    """ RFC7748 ladder, with per lane conditional swaps """
+    n  = len(ks)
+    x1 = _fe(us)
+    x2 = _fe_const(1,n)
+    z2 = _fe_const(0,n)
+    x3 = x1.copy()
+    z3 = _fe_const(1,n)
+    swap = numpy.zeros(n, dtype=bool)
+    nbits = max(k.bit_length() for k in ks)
+    kb = _bytes(ks, nbits)
+    for t in range(nbits-1, -1, -1):
+        kt = _digit(kb,t,1).astype(bool)
+        swap ^= kt
+        x2,x3 = numpy.where(swap,x3,x2), numpy.where(swap,x2,x3)
+        z2,z3 = numpy.where(swap,z3,z2), numpy.where(swap,z2,z3)
+        swap = kt
+        A  = x2+z2
+        AA = _sq(A)
+        B  = x2-z2
+        BB = _sq(B)
+        E  = AA-BB
+        C  = x3+z3
+        D  = x3-z3
+        DA = _mul(D,A)
+        CB = _mul(C,B)
+        x3 = _sq(DA+CB)
+        z3 = _mul(x1,_sq(DA-CB))
+        x2 = _mul(AA,BB)
+        z2 = _mul(E,_carry(BB+_mul_small(E,a24)))
+    x2 = numpy.where(swap,x3,x2)
+    z2 = numpy.where(swap,z3,z2)
+    return [(x*inv_mod(z,_P))%_P for x,z in zip(_ints(x2),_ints(z2))]
+
+
+def ed25519_verify_many(msgs, sigs, pu_keys, fmt="EDDSA", lanes=None):
+    """ Verifies many Ed25519 signatures at once.
+
+    Each result is the one of EDDSA(hashlib.sha512,fmt=fmt).verify(msg,sig,key),
+    except that a non reduced S (S >= L) gives False, as required by
+    RFC 8032, where :func:`ecpy.eddsa.EDDSA.verify` reduces it.
+    S*B-h*A is computed for all signatures in lockstep, 2 bits of both
+    scalars per step.
+
+    Args:
+        msgs (bytes[])                  : messages
+        sigs (bytes[])                  : signatures
+        pu_keys (ecpy.keys.ECPublicKey[]) : Ed25519 public keys
+        fmt (str)                       : signature format
+        lanes (int)                     : lanes per NumPy block, default to LANES
+
+    Returns:
+        bool[]: verification results
+    """
+    if not (len(msgs) == len(sigs) == len(pu_keys)):
+        raise ECPyException("ed25519_verify_many: length mismatch")
+    curve = Curve.get_curve('Ed25519')
+    n     = curve.order
+    items = []
+    for msg,sig,pu_key in zip(msgs,sigs,pu_keys):
+        eR,S = decode_sig(sig, fmt)
+        if S >= n:
+            items.append(None)
+            continue
+        eR = eR.to_bytes(32,'little')
+        try:
+            R = curve.decode_point(eR, cache=False)
+        except ECPyException:
+            items.append(None)
+            continue
+        hasher = hashlib.sha512()
+        hasher.update(eR)
+        hasher.update(curve.encode_point(pu_key.W))
+        hasher.update(msg)
+        h = int.from_bytes(hasher.digest(),'little')%n
+        items.append((S,h,pu_key.W,R))
+    todo = [i for i in range(len(items)) if items[i] is not None]
+    res = [False]*len(items)
+    if numpy is None:
+        for i in todo:
+            S,h,A,R = items[i]
+            res[i] = curve.mul_add(S,curve.generator, -h,A) == R
+        return res
+    lanes = lanes or LANES
+    for j in range(0, len(todo), lanes):
+        block = [items[i] for i in todo[j:j+lanes]]
+        pts = _sb_ha_lanes(curve, block)
+        for i,(x,y),item in zip(todo[j:j+lanes], pts, block):
+            R = item[3]
+            res[i] = (x == getattr(R,'_x',0) and y == getattr(R,'_y',0))
+    return res
+
+def _ext_from(xs, ys, d2):
+    """ affine -> cached (Y+X, Y-X, 2d*T, 2Z) """
+    x = _fe(xs)
+    y = _fe(ys)
+    n = len(xs)
+    return (_carry(y+x), _carry(y-x), _mul(_mul(x,y),d2), _fe_const(2,n))
+
+def _cached(X,Y,Z,T, d2):
+    return (_carry(Y+X), _carry(Y-X), _mul(T,d2), _carry(Z+Z))
+
+def _add(X1,Y1,Z1,T1, YpX2,YmX2,T2d2,Z22):
+    """ add-2008-hwcd-3, second operand in cached form """
+    A = _mul(Y1-X1,YmX2)
+    B = _mul(Y1+X1,YpX2)
+    C = _mul(T1,T2d2)
+    D = _mul(Z1,Z22)
+    E = B-A
+    F = D-C
+    G = D+C
+    H = B+A
+    return (_mul(E,F), _mul(G,H), _mul(F,G), _mul(E,H))
+
+def _dbl(X1,Y1,Z1):
+    """ dbl-2008-hwcd, a=-1 """
+    A = _sq(X1)
+    B = _sq(Y1)
+    C = _sq(Z1)
+    C = C+C
+    E = _carry(_sq(X1+Y1)-A-B)
+    G = B-A
+    F = _carry(G-C)
+    H = -A-B
+    return (_mul(E,F), _mul(G,H), _mul(F,G), _mul(E,H))
+
+def _sb_ha_lanes(curve, block):
+    """ Returns affine S*B-h*A of each (S,h,A,R) item """
+    m  = len(block)
+    d2 = _fe_const((2*curve.d)%_P, m)
+    B  = curve.generator
+    #table[4*i+j] = i*B - j*A, in cached form
+    Bs = [(B*i) for i in (1,2,3)]
+    As = [(-item[2]) for item in block]
+    pB = [_ext_from([P.x]*m,[P.y]*m,d2) for P in Bs]
+    pA = [_ext_from([P.x for P in As],[P.y for P in As],d2)]
+    one  = _fe_const(1,m)
+    zero = _fe_const(0,m)
+    extA = [(_fe([P.x for P in As]),_fe([P.y for P in As]),one,
+             _fe([(P.x*P.y)%_P for P in As]))]
+    for j in (2,3):
+        X,Y,Z,T = extA[-1]
+        extA.append(_add(X,Y,Z,T,*pA[0]))
+        pA.append(_cached(*(extA[-1]+(d2,))))
+    table = [None]*16
+    table[0] = (one,one,zero,_fe_const(2,m))
+    for i in (1,2,3):
+        table[4*i] = pB[i-1]
+    for j in (1,2,3):
+        table[j] = pA[j-1]
+        X,Y,Z,T = extA[j-1]
+        for i in (1,2,3):
+            table[4*i+j] = _cached(*(_add(X,Y,Z,T,*pB[i-1])+(d2,)))
+    table = numpy.stack([numpy.concatenate(e) for e in table])  #(16,40,m)
+    Ss = [item[0] for item in block]
+    hs = [item[1] for item in block]
+    nbits = max(max(k.bit_length() for k in Ss), max(k.bit_length() for k in hs))
+    Sb = _bytes(Ss, nbits)
+    hb = _bytes(hs, nbits)
+    X,Y,Z,T = zero,one,one,zero
+    for t in range(((nbits+1)//2)*2-2, -1, -2):
+        X,Y,Z,T = _dbl(X,Y,Z)
+        X,Y,Z,T = _dbl(X,Y,Z)
+        sel = (4*_digit(Sb,t,2)+_digit(hb,t,2)).astype(numpy.intp)
+        e = numpy.take_along_axis(table, sel[None,None,:], axis=0)[0]
+        X,Y,Z,T = _add(X,Y,Z,T, e[0:10],e[10:20],e[20:30],e[30:40])
+    res = []
+    for x,y,z in zip(_ints(X),_ints(Y),_ints(Z)):
+        iz = inv_mod(z,_P)
+        res.append(((x*iz)%_P,(y*iz)%_P))
+    return res
+
+
+if __name__ == "__main__":
+    import random
+    from ecpy.curves import decode_scalar_25519
+    from ecpy.keys import ECPrivateKey
+    from ecpy.eddsa import EDDSA
+    try:
+        cv = Curve.get_curve('Curve25519')
+        ks = [decode_scalar_25519(bytes(bytearray(random.getrandbits(8) for i in range(32))))
+              for i in range(20)]
+        Ps = [cv.generator*random.randrange(1,cv.order) for i in range(20)]
+        Qs = x25519_many(ks, Ps)
+        assert([Q.x for Q in Qs] == [(k*P).x for k,P in zip(ks,Ps)])
+
+        cv = Curve.get_curve('Ed25519')
+        signer = EDDSA(hashlib.sha512)
+        msgs,sigs,keys = [],[],[]
+        for i in range(20):
+            pv_key = ECPrivateKey(random.getrandbits(256), cv)
+            pu_key = EDDSA.get_public_key(pv_key)
+            msg = bytes(bytearray([i]))*i
+            msgs.append(msg)
+            sigs.append(signer.sign(msg,pv_key))
+            keys.append(pu_key)
+        #corrupt a few
+        msgs[3] = b'x'
+        keys[5] = keys[6]
+        sigs[7] = sigs[7][:40]+bytes(bytearray([sigs[7][40]^1]))+sigs[7][41:]
+        #invalid R encoding
+        sigs[9] = b'\xff'*31+b'\x7f'+sigs[9][32:]
+        expected = [signer.verify(m,s,k) for m,s,k in zip(msgs,sigs,keys)]
+        assert(expected.count(False) == 4)
+        #non reduced S, accepted by EDDSA.verify only
+        S = int.from_bytes(sigs[11][32:],'little')
+        sigs[11] = sigs[11][:32]+(S+cv.order).to_bytes(32,'little')
+        assert(signer.verify(msgs[11],sigs[11],keys[11]))
+        expected[11] = False
+        assert(ed25519_verify_many(msgs,sigs,keys) == expected)
+        assert(ed25519_verify_many(msgs,sigs,keys,lanes=3) == expected)
+        np, numpy = numpy, None
+        assert(ed25519_verify_many(msgs,sigs,keys) == expected)
+        numpy = np
+
+        ##OK!
+        print("All internal assert OK!")
+    finally:
+        pass
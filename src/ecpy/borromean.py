@@ -149,7 +149,7 @@ class Borromean:
                 s[r0+j] = random.randint(1,order)
                 e_ij = _borromean_hash(m,e_ij,i,j, self._hash) 
                 e_ij = int.from_bytes(e_ij,'big')
-                sG_eP = s[r0+j]*G + e_ij*pubkeys[r0+j].W
+                sG_eP = self._curve.mul_add(s[r0+j], G, e_ij, pubkeys[r0+j].W)
                 e_ij = _point_to_bytes(sG_eP)
             sha256_e0.update(e_ij)
             r0 += rsizes[i]
@@ -163,7 +163,7 @@ class Borromean:
             e_ij = int.from_bytes(e_ij,'big')
             for j in range(0, j0):
                 s[r0+j] = random.randint(1,order)           
-                sG_eP = s[r0+j]*G + e_ij*pubkeys[r0+j].W
+                sG_eP = self._curve.mul_add(s[r0+j], G, e_ij, pubkeys[r0+j].W)
                 e_ij = _borromean_hash(m,_point_to_bytes(sG_eP),i,j+1, self._hash)
                 e_ij = int.from_bytes(e_ij,'big')
             s[r0+j0] = (k[i]-privkeys[i].d*e_ij)%order
@@ -201,7 +201,7 @@ class Borromean:
             for j in range(0,rsizes[i]):
                 e_ij = int.from_bytes(e_ij,'big')
                 s_ij = int.from_bytes(s[r0+j],'big')
-                sG_eP = s_ij*G + e_ij*pubkeys[r0+j].W
+                sG_eP = self._curve.mul_add(s_ij, G, e_ij, pubkeys[r0+j].W)
                 e_ij = _point_to_bytes(sG_eP)
                 if j != rsizes[i]-1:
                     e_ij = _borromean_hash(m,e_ij,i,j+1, self._hash) 
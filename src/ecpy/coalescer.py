@@ -0,0 +1,295 @@
+# Copyright 2016 Cedric Mesnil <cedric.mesnil@ubinity.com>, Ubinity SAS
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-batching of concurrent signature verifications.
+
+:class:`VerificationCoalescer` turns many concurrent single `verify`
+calls into batches run by the signer `verify_batch`, see
+:mod:`ecpy.batch`. Its results are therefore the ones of `verify_batch`,
+in the mode given by the coalescer options.
+"""
+
+#python 2 compatibility
+from builtins import int,pow
+
+import concurrent.futures
+import threading
+import time
+
+from ecpy.curves import ECPyException
+
+
+class VerificationCoalescer(object):
+    """ Groups concurrent signature verifications into batches.
+
+    Callers, threads or coroutines, submit single verifications and get a
+    future back. Pending verifications are run as one batch when
+    `max_items` are queued or `max_delay` milliseconds after the first one
+    was queued, whichever comes first. Batches, even of a single item, go
+    through `signer.verify_batch` when the signer has one, so that results
+    do not depend on how requests were grouped. Else each item is verified
+    with `signer.verify`, extra item data being ignored.
+
+    Batches run on a background thread, one at a time. If a batch raises,
+    its items are run again one by one so that only the faulty caller gets
+    the exception.
+
+    Extra keyword arguments are passed to both `verify_batch` and
+    `verify`. They select the verification mode, for instance
+    `cofactored=True` for EDDSA, which is required to get the batch speed
+    up. Without them, results are the ones of the signer default `verify`.
+
+    Args:
+        signer:              ECDSA, EDDSA, ECSchnorr... instance
+        max_items (int):     batch size triggering a flush
+        max_delay (float):   maximal queuing time in milliseconds
+        options:             verification mode keyword arguments
+    """
+
+    def __init__(self, signer, max_items=64, max_delay=2.0, **options):
+        self.signer = signer
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.options = options
+        self._pending = []
+        self._deadline = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, msg, sig, pu_key, *extra):
+        """ Queues a verification.
+
+        Args:
+            msg (bytes)                  : the message hash to verify the signature
+            sig (bytes)                  : signature to verify
+            pu_key (ecpy.keys.ECPublicKey): key to use for verifying
+            extra                        : item hints for `verify_batch`, as
+                                           the ECDSA recovery id
+
+        Returns:
+            concurrent.futures.Future: resolved with the verification result
+        """
+        f = concurrent.futures.Future()
+        with self._cond:
+            if self._closed:
+                raise ECPyException('coalescer is closed')
+            if not self._pending:
+                self._deadline = time.monotonic() + self.max_delay/1000.
+            self._pending.append(((msg,sig,pu_key)+extra, f))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop,
+                                                name='ecpy-coalescer')
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        return f
+
+    def verify(self, msg, sig, pu_key, *extra):
+        """ Queues a verification and waits for its result, see :func:`submit`.
+
+        Returns:
+            boolean : True if signature is verified, False else
+        """
+        return self.submit(msg, sig, pu_key, *extra).result()
+
+    def verify_async(self, msg, sig, pu_key, *extra):
+        """ Queues a verification, for use from asyncio code.
+
+        See :func:`submit`. Cancelling the returned future withdraws the
+        item if its batch has not started yet.
+
+        Returns:
+            asyncio.Future: resolved with the verification result
+        """
+        import asyncio
+        return asyncio.wrap_future(self.submit(msg, sig, pu_key, *extra))
+
+    def flush(self):
+        """ Runs all pending verifications now, in the calling thread. """
+        with self._cond:
+            batch = self._pending
+            self._pending = []
+        for i in range(0, len(batch), self.max_items):
+            self._run(batch[i:i+self.max_items])
+
+    def close(self):
+        """ Runs pending verifications and stops the background thread. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    n = len(self._pending)
+                    if n >= self.max_items or (n and self._closed):
+                        break
+                    if self._closed:
+                        return
+                    if n:
+                        delay = self._deadline - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                batch = self._pending[:self.max_items]
+                self._pending = self._pending[self.max_items:]
+            self._run(batch)
+
+    def _run(self, batch):
+        batch = [(item,f) for item,f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        verify_batch = getattr(self.signer, 'verify_batch', None)
+        if verify_batch is None:
+            verify = lambda item: self.signer.verify(*item[:3], **self.options)
+        else:
+            try:
+                res = verify_batch([item for item,f in batch], **self.options)
+            except Exception:
+                pass
+            else:
+                for (item,f),r in zip(batch,res):
+                    f.set_result(r)
+                return
+            verify = lambda item: verify_batch([item], **self.options)[0]
+        for item,f in batch:
+            try:
+                f.set_result(verify(item))
+            except Exception as e:
+                f.set_exception(e)
+
+
+if __name__ == "__main__":
+    import asyncio
+    import hashlib
+    import random
+    from ecpy.curves import Curve
+    from ecpy.keys import ECPrivateKey
+    from ecpy.ecdsa import ECDSA
+
+    try:
+        cv = Curve.get_curve('secp256k1')
+        signer = ECDSA()
+        pv = [ECPrivateKey(random.randrange(1,cv.order), cv) for i in range(12)]
+        msgs = [hashlib.sha256(b'msg %d'%i).digest() for i in range(12)]
+        items = [(m, signer.sign(m,k), k.get_public_key()) for m,k in zip(msgs,pv)]
+        items[7] = (msgs[8], items[7][1], items[7][2])
+        expect = [signer.verify(*it) for it in items]
+        assert expect.count(False) == 1
+
+        class BatchSigner(object):
+            def __init__(self):
+                self.batches = []
+            def verify(self, msg, sig, pu_key):
+                if sig is None:
+                    raise ECPyException('bad signature')
+                return signer.verify(msg, sig, pu_key)
+            def verify_batch(self, items):
+                self.batches.append([len(it) for it in items])
+                return [self.verify(*it[:3]) for it in items]
+
+        # size trigger, from threads
+        bs = BatchSigner()
+        with VerificationCoalescer(bs, max_items=4, max_delay=60000) as co:
+            t0 = time.time()
+            futures = [co.submit(*it) for it in items]
+            assert [f.result() for f in futures] == expect
+            assert time.time()-t0 < 30
+        assert bs.batches == [[3]*4]*3
+
+        # single items and extra data go through verify_batch
+        bs = BatchSigner()
+        with VerificationCoalescer(bs, max_items=1) as co:
+            assert [co.verify(*(it+(0,))) for it in items] == expect
+        assert bs.batches == [[4]]*len(items)
+
+        # deadline trigger, with a failing item and no verify_batch
+        with VerificationCoalescer(signer, max_items=100, max_delay=5) as co:
+            out = [None]*len(items)
+            def worker(i):
+                out[i] = co.verify(*items[i])
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(items))]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            assert out == expect
+
+        # exceptions only reach their caller
+        bs = BatchSigner()
+        with VerificationCoalescer(bs, max_items=3, max_delay=60000) as co:
+            f1 = co.submit(*items[0])
+            f2 = co.submit(msgs[1], None, items[1][2])
+            f3 = co.submit(*items[2])
+            assert f1.result() and f3.result()
+            assert isinstance(f2.exception(), ECPyException)
+        assert bs.batches == [[3]*3,[3],[3],[3]]
+
+        # verification mode: EDDSA signatures with a small order R component
+        import os
+        from ecpy.eddsa import EDDSA
+        from ecpy.formatters import encode_sig
+        cv = Curve.get_curve('Ed25519')
+        ed = EDDSA(hashlib.sha512)
+        epv = ECPrivateKey(random.randrange(1,cv.order), cv)
+        pu = EDDSA.get_public_key(epv, hashlib.sha512)
+        T = None
+        while T is None:
+            try:
+                T = cv.order*cv.decode_point(os.urandom(32), cache=False)
+            except ECPyException:
+                continue
+            if T.x == 0:
+                T = None
+        a,A,prefix = EDDSA._get_materials(epv)
+        R = 12345*cv.generator + T
+        eR = bytes(cv.encode_point(R))
+        S = (12345 + ed._challenge(cv, eR, A, b'msg')*a)%cv.order
+        sig = encode_sig(int.from_bytes(eR,'little'), S, ed.fmt, 32)
+        eitems = [(b'msg', ed.sign(b'msg',epv), pu), (b'msg', sig, pu)]
+        for options,eexpect in (({}, [True,False]),
+                                ({'cofactored':False}, [True,False]),
+                                ({'cofactored':True}, [True,True])):
+            assert [ed.verify(*it, **options) for it in eitems] == eexpect
+            with VerificationCoalescer(ed, max_items=2, **options) as co:
+                assert [f.result() for f in [co.submit(*it) for it in eitems]] == eexpect
+
+        # coroutines, cancellation, explicit flush
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        co = VerificationCoalescer(BatchSigner(), max_items=100, max_delay=60000)
+        futures = [co.verify_async(*it) for it in items]
+        futures[0].cancel()
+        loop.run_until_complete(asyncio.sleep(0))
+        co.flush()
+        res = loop.run_until_complete(asyncio.gather(*futures, return_exceptions=True))
+        assert isinstance(res[0], asyncio.CancelledError)
+        assert res[1:] == expect[1:]
+        assert co.signer.batches == [[3]*(len(items)-1)]
+        co.close()
+        loop.close()
+
+        print("All internal assert OK!")
+    finally:
+        pass
@@ -26,6 +26,15 @@ from builtins import int,pow
 
 import binascii
 import random
+import heapq
+import os
+import collections
+import threading
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
 
 
 
@@ -62,6 +71,154 @@ def encode_scalar_25519(k):
     return k
 
 
+try:
+    pow(2,-1,3)
+    _HAS_POW_INV = True
+except (ValueError,TypeError):
+    _HAS_POW_INV = False
+
+def inv_mod(x, m, secret=False):
+    """ Returns the inverse of x modulo m
+
+    The built-in extended Euclid of pow(x,-1,m) is used when available,
+    else Fermat's little theorem, which requires m to be prime. The
+    extended Euclid running time depends on x: secret values (nonces,
+    coordinates of secret multiples) use Fermat's exponentiation, whose
+    sequence of operations only depends on m.
+
+    Args:
+        x (int): value to invert
+        m (int): prime modulus
+        secret (bool): x is secret
+
+    Returns:
+        int: x^-1 mod m, or 0 if x is 0 mod m
+    """
+    x = x%m
+    if x == 0:
+        return 0
+    if _HAS_POW_INV and not secret:
+        return pow(x,-1,m)
+    return pow(x,m-2,m)
+
+def batch_inverse(values, modulus, secret=False):
+    """ Inverts all values modulo `modulus` with Montgomery's trick
+
+    Only one modular inversion and 3(N-1) multiplications are needed.
+    Zero values are left to zero.
+
+    Args:
+        values (int[]) : values to invert
+        modulus (int)  : modulus
+        secret (bool)  : values are secret, see :func:`inv_mod`
+
+    Returns:
+        int[]: inverses, in the same order than values
+    """
+    m = modulus
+    n = len(values)
+    prods = [0]*n
+    acc = 1
+    for i in range(n):
+        v = values[i]%m
+        if v:
+            acc = (acc*v)%m
+        prods[i] = acc
+    inv = inv_mod(acc,m,secret)
+    invs = [0]*n
+    for i in range(n-1,-1,-1):
+        v = values[i]%m
+        if v:
+            prev = prods[i-1] if i else 1
+            invs[i] = (inv*prev)%m
+            inv = (inv*v)%m
+    return invs
+
+
+class _MersenneField(int):
+    """ Mersenne field prime 2^s-1, reducing with shift-and-add folds.
+
+    Formulas reduce with `x%q`: as an int subclass, `q.__rmod__` takes
+    precedence over `int.__mod__` and folds x = hi*2^s+lo into hi+lo.
+    """
+
+    def __new__(cls, p):
+        q = int.__new__(cls, p)
+        q._s = p.bit_length()
+        q._p = int(p)
+        return q
+
+    def __rmod__(self, x):
+        s = self._s
+        p = self._p
+        x = (x&p) + (x>>s)
+        x = (x&p) + (x>>s)
+        return x%p
+
+    def __reduce__(self):
+        return (_MersenneField, (self._p,))
+
+_BACKENDS = ("python","gmpy2")
+_backend = "python"
+if os.environ.get("ECPY_BACKEND") == "gmpy2" and gmpy2 is not None:
+    _backend = "gmpy2"
+
+def get_backend():
+    """ Returns the name of the current big integer backend,
+    "python" or "gmpy2".
+    """
+    return _backend
+
+def set_backend(name):
+    """ Selects the big integer backend of field arithmetic.
+
+    With "gmpy2", the field prime of curves is a gmpy2 mpz, so all
+    coordinates computed modulo it, and every pow, are handled by GMP.
+    Point coordinates are still returned as int.
+    The default backend is "python", unless the ECPY_BACKEND environment
+    variable is set to "gmpy2" and gmpy2 is installed.
+
+    Curves already returned by :func:`Curve.get_curve` keep the previous
+    backend, the next calls return new instances.
+
+    Args:
+        name (str): "python" or "gmpy2"
+
+    Raises:
+        ECPyException: if the backend is unknown or gmpy2 is not installed
+    """
+    global _backend
+    if name not in _BACKENDS:
+        raise ECPyException("Unknown backend: %s"%name)
+    if name == "gmpy2" and gmpy2 is None:
+        raise ECPyException("gmpy2 backend requires the gmpy2 package")
+    if name != _backend:
+        Curve._instances.clear()
+    _backend = name
+
+def _field_modulus(p):
+    """ Returns the field prime object used by curve formulas.
+
+    With the gmpy2 backend, this is p as a mpz.
+
+    With the python one, folding reductions only beat the C
+    division of `%` when the division is expensive and the fold very
+    cheap. Measured on CPython 3 over whole scalar multiplications:
+
+       - 2^521-1 (secp521r1)                         : 20-40% faster
+       - 2^255-19, 2^256-2^32-977 and other 2^s-c    : 10-50% slower
+       - 2^448-2^224-1, NIST Solinas primes          : 40-100% slower
+
+    So only Mersenne primes get a folding reduction, any other prime
+    is kept as a plain int reduced by `%`.
+    """
+    if _backend == "gmpy2":
+        return gmpy2.mpz(p)
+    if p&(p+1) == 0:
+        return _MersenneField(p)
+    return p
+
+
 class Curve:
     """Elliptic Curve abstraction
 
@@ -84,10 +241,15 @@ class Curve:
 
     """
     
+    #name -> Curve, see get_curve
+    _instances = {}
 
     @staticmethod
     def get_curve(name):
         """Return a Curve object  according to its name
+
+       Curves are singletons: all calls with the same name return the
+       same object, so precomputed tables and caches are shared.
         
        Args:
            name (str) : curve name to retrieve
@@ -95,18 +257,22 @@ class Curve:
        Returns:
            Curve:          Curve object
         """
-        
-        l = [c for c in curves if c['name']==name]
-        if len(l) == 0:
+        curve = Curve._instances.get(name)
+        if curve is not None:
+            return curve
+        cp = _curves_by_name.get(name)
+        if cp is None:
             return None
-        cp = l[0]
         if cp['type'] == WEIERSTRASS:
-            return WeierstrassCurve(cp)
-        if cp['type'] == TWISTEDEDWARD:
-            return TwistedEdwardCurve(cp)
-        if cp['type'] == MONTGOMERY:
-            return MontgomeryCurve(cp)
-        return None
+            curve = WeierstrassCurve(cp)
+        elif cp['type'] == TWISTEDEDWARD:
+            curve = TwistedEdwardCurve(cp)
+        elif cp['type'] == MONTGOMERY:
+            curve = MontgomeryCurve(cp)
+        else:
+            return None
+        Curve._instances[name] = curve
+        return curve
 
     @staticmethod    
     def get_curve_names():
@@ -122,18 +288,21 @@ class Curve:
         raise NotImplementedError('Abstract method __init__')
     
     def _set(self, params, keys):
+        """ Sets domain parameters, as plain attributes """
         for k in keys :
             self._domain[k] = params[k]
+        self._domain['field'] = _field_modulus(self._domain['field'])
         self._domain['name'] = str(self._domain['name'])
+        for k in keys:
+            setattr(self, k, self._domain[k])
         x = self._domain['generator'][0]
         y = self._domain['generator'][1]
-        self._domain['generator'] = Point(x,y,self)
-
-        
-    def __getattr__(self, name):
-        if name in self._domain:
-            return self._domain[name]
-        raise AttributeError(name)
+        self.generator = Point(x,y,self)
+        self._domain['generator'] = self.generator
+        self._tables = {}
+        self._interned = _InternPool(1024)
+        self._decode_cache = None
+        self._sqrt_setup()
 
     def __str__(self):
         return str(self._domain).replace(',','\n')
@@ -190,16 +359,35 @@ class Curve:
         """        
         return self.add_point(P,Q.neg())
 
+    def _neg_point(self, P):
+        return _trusted_point(P.x,self.field-P.y,self)
+
             
-    def mul_point(self, k, P):
+    def mul_point(self, k, P, mode="ladder"):
         """ Returns the scalar multiplication  P with k.
 
         This function ignores the default curve attach to P and Q, 
         and assumes P and Q are on this curve.
-    
+
+        Two methods are available for a variable point:
+
+           - "ladder": Montgomery ladder, one addition and one doubling per bit.
+             This is the default and should be used for secret scalars.
+           - "wnaf": width-w NAF with precomputed odd multiples, one doubling
+             per bit but only about one addition every w+1 bits. Only use it
+             when k is public, as for signature verification. On curves with
+             a GLV endomorphism, k is split in two halves sharing the doublings.
+
+        Points with a :class:`FixedBaseTable`, such as the curve generator,
+        use their table whatever the mode: its evaluation is regular, one
+        mixed addition per window for any scalar, so it is suitable for
+        secret scalars too. As for the ladder, this only holds at the
+        formula level, Python integer arithmetic is not constant time.
+
         Args:
             P (Point): point to mul_point
             k (int)  : scalar to multiply
+            mode (str): "ladder" or "wnaf"
 
         Returns:
             Point: A new Point R = k*Q
@@ -207,20 +395,542 @@ class Curve:
         Raises:
             ECPyException : with "Point not on curve", if Point R is not 
             on curve, thus meaning P was not on.
+            ECPyException : with "Point at infinity", if R is the point at
+            infinity of a short Weierstrass curve, as when k is a multiple
+            of the order of P. On twisted Edward curves, the neutral point
+            (0,1) is returned.
 
         """        
         raise NotImplementedError('Abstract method mul_point')
 
+    def intern_point(self, P):
+        """ Returns the pooled instance of P.
+
+        The first Point interned with given coordinates is returned by
+        later calls, so hot points (generator, frequently seen public keys)
+        are shared, are compared by identity first in dict and set lookups
+        and keep their derived data. The generator is always interned.
+        Other points are kept in a bounded LRU pool of 1024 entries, so
+        interning points from untrusted input does not grow memory.
+
+        Args:
+            P (Point): point to intern
+
+        Returns:
+            Point: the pooled point equal to P
+        """
+        if P == self.generator:
+            return self.generator
+        return self._interned.get(P, lambda P: P)
+
+    def precompute(self, P, w=4):
+        """ Precomputes a :class:`FixedBaseTable` for P.
+
+        Once done, any further :func:`mul_point` involving P uses the table.
+        The curve generator is automatically precomputed on first use.
+
+        Args:
+            P (Point): static point, in the subgroup generated by the curve generator
+            w (int)  : window width
+
+        Returns:
+            FixedBaseTable: the table attached to P
+        """
+        table = FixedBaseTable(P, w)
+        self._tables[(P.x,P.y)] = table
+        return table
+
+    def mul_add(self, a, P, b, Q):
+        """ Returns a*P + b*Q
+
+        Both products share the same doubling chain (Straus/Shamir trick
+        over the joint sparse form of a and b) and the result is
+        normalized only once, so the cost is close to a single
+        :func:`mul_point`. When P or Q has a :class:`FixedBaseTable`, as
+        the curve generator, its product is taken from the table instead.
+        On curves with a GLV endomorphism (secp256k1, ...) scalars are
+        first split in two halves.
+
+        Scalars are considered public. Negative scalars are allowed.
+
+        Args:
+            a (int)  : first scalar
+            P (Point): first point
+            b (int)  : second scalar
+            Q (Point): second point
+
+        Returns:
+            Point: A new Point R = a*P+b*Q
+
+        Raises:
+            ECPyException : with "Point at infinity", see :func:`mul_point`
+        """
+        return self._proj_to_point(self._mul_add(a,P, b,Q))
+
+    def _mul_add(self, a, P, b, Q):
+        tP = self._fixed_base(P)
+        tQ = self._fixed_base(Q)
+        if tP is None and tQ is None:
+            return self._mul_jsf(a,P, b,Q)
+        if tP is not None:
+            R = tP._mul(a)
+        else:
+            R = self._mul_wnaf(a,P)
+        if tQ is not None:
+            S = tQ._mul(b)
+        else:
+            S = self._mul_wnaf(b,Q)
+        return self._proj_add(R,S)
+
+    def _mul_jsf(self, a, P, b, Q):
+        """ Shamir's trick over the joint sparse form of a,b, see :func:`mul_add` """
+        P = self._proj_from(P)
+        Q = self._proj_from(Q)
+        split = self._endo_split([a,b],[P,Q])
+        if split is not None:
+            return self._mul_straus(split[0],split[1])
+        if a < 0:
+            a = -a
+            P = self._proj_neg(P)
+        if b < 0:
+            b = -b
+            Q = self._proj_neg(Q)
+        PQ  = self._proj_add(P,Q)
+        PmQ = self._proj_add(P,self._proj_neg(Q))
+        P,Q,PQ,PmQ = self._proj_prep_many([P,Q,PQ,PmQ])
+        #index by 3*u0+u1, u0 and u1 in {-1,0,1}
+        table = [None]*9
+        table[3+1] = PQ
+        table[3-1] = PmQ
+        table[3]   = P
+        table[1]   = Q
+        table[-3-1] = self._prep_neg(PQ)
+        table[-3+1] = self._prep_neg(PmQ)
+        table[-3]   = self._prep_neg(P)
+        table[-1]   = self._prep_neg(Q)
+        R = self._proj_zero()
+        for u0,u1 in reversed(_jsf(a,b)):
+            R = self._proj_dbl(R)
+            if u0 or u1:
+                R = self._proj_madd(R, table[3*u0+u1])
+        return R
+
+    def multi_mul(self, scalars, points, method=None):
+        """ Returns the sum of k_i*P_i
+
+        Points having a :class:`FixedBaseTable` use it. The other ones are
+        processed by one of the following methods:
+
+           - "straus": interleaved wNAF, one shared doubling chain. Best for
+             a few terms.
+           - "pippenger": bucket method over signed windows. Its cost grows
+             like n*b/log(n) instead of n*b/w, so it wins for large n.
+           - "bos-coster": repeated reduction of the two largest scalars.
+             Never selected automatically.
+
+        When `method` is None, "straus" or "pippenger" is chosen, with its
+        window width, according to a cost model based on the number of
+        terms and the scalar bit length.
+
+        Scalars are considered public. Negative scalars are allowed.
+
+        Args:
+            scalars (int[])  : scalars k_i
+            points (Point[]) : points P_i, same length as scalars
+            method (str)     : None, "straus", "pippenger" or "bos-coster"
+
+        Returns:
+            Point: A new Point R = sum(k_i*P_i)
+
+        Raises:
+            ECPyException : with "Point at infinity", see :func:`mul_point`
+        """
+        return self._proj_to_point(self._multi_mul(scalars, points, method))
+
+    def multi_mul_is_zero(self, scalars, points, method=None):
+        """ Tells if the sum of k_i*P_i is the neutral element.
+
+        Same computation as :func:`multi_mul`, without normalization of the
+        result, which may be the point at infinity. This is the final check
+        of batch signature verifications.
+
+        Args:
+            scalars (int[])  : scalars k_i
+            points (Point[]) : points P_i, same length as scalars
+            method (str)     : see :func:`multi_mul`
+
+        Returns:
+            bool: True if sum(k_i*P_i) is the neutral element
+        """
+        R = self._multi_mul(scalars, points, method)
+        return self._proj_eq(R, self._proj_zero())
+
+    def _multi_mul(self, scalars, points, method=None):
+        if len(scalars) != len(points):
+            raise ECPyException("multi_mul: scalars and points length mismatch")
+        R = self._proj_zero()
+        ks = []
+        Rs = []
+        for k,P in zip(scalars,points):
+            table = self._fixed_base(P)
+            if table is not None:
+                R = self._proj_add(R, table._mul(k))
+            elif k:
+                ks.append(k)
+                Rs.append(self._proj_from(P))
+        if not ks:
+            return R
+        if method == "bos-coster":
+            S = self._mul_bos_coster(ks, Rs)
+        else:
+            split = self._endo_split(ks, Rs)
+            if split is not None:
+                ks,Rs = split
+            b = max(abs(k) for k in ks).bit_length()
+            method,w = self._multi_mul_plan(len(ks), b, method)
+            if method == "straus":
+                S = self._mul_straus(ks, Rs, w)
+            else:
+                S = self._mul_pippenger(ks, Rs, w)
+        return self._proj_add(R,S)
+
+    @staticmethod
+    def _multi_mul_plan(n, b, method=None):
+        """ Returns the cheapest (method, window) for n terms of b bits.
+
+        Costs are counted in tenths of a mixed addition, a full addition
+        costing 11, a doubling 8 and the normalization of a point 3:
+          - straus    : n*2^(w-2) full additions and normalizations for
+                        the tables, b doublings, n*b/(w+1) mixed additions,
+                        and n*b/20 for the recoding and the digit scan
+          - pippenger : n normalizations, then ceil(b/c)+1 windows of n
+                        mixed bucket additions, 2^c full additions to sum
+                        the buckets and c doublings
+        """
+        best = None
+        if method in (None,"straus"):
+            for w in range(2,8):
+                cost = 14*n*(1<<(w-2)) + 8*b + (10*n*b)//(w+1) + (n*b)//2
+                if best is None or cost < best[0]:
+                    best = (cost,"straus",w)
+        if method in (None,"pippenger"):
+            for c in range(2,17):
+                cost = 3*n + ((b+c-1)//c+1)*(10*n + 11*(1<<c) + 8*c)
+                if best is None or cost < best[0]:
+                    best = (cost,"pippenger",c)
+        if best is None:
+            raise ECPyException("Unsupported multi_mul method: %s"%method)
+        return best[1],best[2]
+
+    def _mul_straus(self, scalars, Rs, w=None):
+        """ interleaved wNAF over projective points, see :func:`multi_mul` """
+        if w is None:
+            b = max(abs(k) for k in scalars).bit_length()
+            w = self._multi_mul_plan(len(scalars), b, "straus")[1]
+        nafs = []
+        odds = []
+        for k,R in zip(scalars,Rs):
+            if k < 0:
+                k = -k
+                R = self._proj_neg(R)
+            R2  = self._proj_dbl(R)
+            odd = [R]
+            for i in range(1, 1<<(w-2)):
+                odd.append(self._proj_add(odd[i-1],R2))
+            nafs.append(_wnaf(k, w))
+            odds.extend(odd)
+        #all odd multiples share one inversion
+        odds = self._proj_prep_many(odds)
+        sz = 1<<(w-2)
+        odds = [odds[i:i+sz] for i in range(0,len(odds),sz)]
+        R = self._proj_zero()
+        for i in range(max(len(naf) for naf in nafs)-1, -1, -1):
+            R = self._proj_dbl(R)
+            for j in range(len(nafs)):
+                naf = nafs[j]
+                if i < len(naf):
+                    d = naf[i]
+                    if d > 0:
+                        R = self._proj_madd(R, odds[j][d>>1])
+                    elif d < 0:
+                        R = self._proj_madd(R, self._prep_neg(odds[j][(-d)>>1]))
+        return R
+
+    def _mul_pippenger(self, scalars, Rs, c):
+        """ bucket method over signed radix 2^c digits, see :func:`multi_mul` """
+        Ps = []
+        digits = []
+        for k,e in zip(scalars,self._proj_prep_many(Rs)):
+            if k < 0:
+                k = -k
+                e = self._prep_neg(e)
+            Ps.append(e)
+            digits.append(_signed_digits(k, c))
+        zero = self._proj_zero()
+        half = 1<<(c-1)
+        R = None
+        for i in range(max(len(d) for d in digits)-1, -1, -1):
+            if R is not None:
+                for j in range(c):
+                    R = self._proj_dbl(R)
+            buckets = [None]*(half+1)
+            for j in range(len(Ps)):
+                if i < len(digits[j]):
+                    d = digits[j][i]
+                    if d > 0:
+                        e = Ps[j]
+                    elif d < 0:
+                        d = -d
+                        e = self._prep_neg(Ps[j])
+                    else:
+                        continue
+                    B = buckets[d]
+                    buckets[d] = self._proj_madd(zero if B is None else B, e)
+            #sum of m*buckets[m] with two running sums
+            running = None
+            for m in range(half,0,-1):
+                B = buckets[m]
+                if B is not None:
+                    running = B if running is None else self._proj_add(running,B)
+                if running is not None:
+                    R = running if R is None else self._proj_add(R,running)
+        if R is None:
+            return self._proj_zero()
+        return R
+
+    def _mul_bos_coster(self, scalars, Rs):
+        """ Bos-Coster reduction, see :func:`multi_mul` """
+        Ps = []
+        heap = []
+        for k,R in zip(scalars,Rs):
+            if k < 0:
+                k = -k
+                R = self._proj_neg(R)
+            heap.append((-k,len(Ps)))
+            Ps.append(R)
+        heapq.heapify(heap)
+        while len(heap) > 1:
+            k1,i1 = heapq.heappop(heap)
+            k2,i2 = heap[0]
+            k1 = -k1
+            k2 = -k2
+            # k1*P1 + k2*P2 = (k1 mod k2)*P1 + k2*(P2 + (k1//k2)*P1)
+            q,r = divmod(k1,k2)
+            if q == 1:
+                P = Ps[i1]
+            else:
+                P = self._mul_wnaf_proj(q, Ps[i1])
+            Ps[i2] = self._proj_add(Ps[i2], P)
+            if r:
+                heapq.heappush(heap,(-r,i1))
+        k,i = heap[0]
+        return self._mul_wnaf_proj(-k, Ps[i])
+
+    def _mul_wnaf(self, k, P, w=None):
+        """ width-w NAF variable base scalar multiplication, see :func:`mul_point` """
+        return self._mul_wnaf_proj(k, self._proj_from(P), w)
+
+    def _mul_wnaf_proj(self, k, R, w=None):
+        split = self._endo_split([k],[R])
+        if split is not None:
+            return self._mul_straus(split[0],split[1],w)
+        if w is None:
+            w = 4 if self.size < 200 else 5
+        if k < 0:
+            k = -k
+            R = self._proj_neg(R)
+        naf = _wnaf(k, w)
+        if not naf:
+            return self._proj_zero()
+        #odd multiples P,3P,...,(2^(w-1)-1)P
+        R2  = self._proj_dbl(R)
+        odd = [R]
+        for i in range(1, 1<<(w-2)):
+            odd.append(self._proj_add(odd[i-1],R2))
+        odd = self._proj_prep_many(odd)
+        i = len(naf)-1
+        R = self._proj_madd(self._proj_zero(), odd[naf[i]>>1])
+        while i > 0:
+            i = i-1
+            R = self._proj_dbl(R)
+            d = naf[i]
+            if d > 0:
+                R = self._proj_madd(R, odd[d>>1])
+            elif d < 0:
+                R = self._proj_madd(R, self._prep_neg(odd[(-d)>>1]))
+        return R
+
+    def _endo_split(self, scalars, Rs):
+        """ Rewrites sum(k_i*R_i) with shorter scalars using an efficient
+        endomorphism, if the curve has one.
+
+        Returns:
+            (int[], tuple[]): new scalars and projective points, or None
+        """
+        return None
+
+    def _fixed_base(self, P):
+        """ Returns the FixedBaseTable attached to P, or None """
+        key = (P.x,P.y)
+        table = self._tables.get(key)
+        if table is None:
+            G = self.generator
+            if key == (G.x,G.y):
+                table = self.precompute(G)
+        return table
+
+    def batch_normalize(self, points):
+        """ Converts many points to affine coordinates at once
+
+        All the inversions are shared thanks to :func:`batch_inverse`,
+        so N points cost one inversion plus a few multiplications each.
+
+        Args:
+            points (ProjectivePoint[]) : points to normalize, :class:`Point`
+                                         are accepted and returned as is
+
+        Returns:
+            Point[]: affine points, in the same order
+        """
+        idx = []
+        Rs = []
+        secret = False
+        out = list(points)
+        for i in range(len(out)):
+            if isinstance(out[i],ProjectivePoint):
+                idx.append(i)
+                Rs.append(out[i]._coords)
+                secret = secret or out[i]._secret
+        Rs = self._proj_normalize_many(Rs, secret)
+        for i,R in zip(idx,Rs):
+            out[i] = self._proj_to_point(R)
+        return out
+
     def encode_point(self, P):
         """ encode/compress a point according to its curve"""
         raise NotImplementedError('Abstract method encode_point')
         pass
 
-    def decode_point(self, eP):
-        """ decode/decompress a point according to its curve"""
+    def decode_point(self, eP, cache=True):
+        """ decode/decompress a point according to its curve
+
+        When a decode cache is set, see :func:`set_decode_cache`, decoded
+        points are looked up there first.
+
+        Args:
+            eP (bytes)  : encoded point
+            cache (bool): use the decode cache, if any. Pass False for
+                          one-shot encodings, such as signature nonces
+        Returns
+           Point : decoded point
+
+        Raises:
+            ECPyException : if eP is not a valid point encoding
+        """
+        decode_cache = self._decode_cache
+        if decode_cache is None or not cache:
+            return self._decode_point(eP)
+        return decode_cache.get(eP, self._decode_point)
+
+    def _decode_point(self, eP):
         raise NotImplementedError('Abstract method _point decode_point')
-    
-        pass
+
+    def set_decode_cache(self, maxsize=1024):
+        """ Sets a LRU cache of decoded points on this curve.
+
+        Repeatedly decoded points, typically public keys, then skip their
+        decompression square root and on-curve check. As curves returned by
+        :func:`get_curve` are singletons, the cache is shared by all users
+        of the curve.
+
+        Args:
+            maxsize (int): maximum number of cached points, None or 0
+                           removes the cache
+
+        Returns:
+            DecodeCache: the new cache, or None
+        """
+        if maxsize:
+            self._decode_cache = DecodeCache(maxsize)
+        else:
+            self._decode_cache = None
+        return self._decode_cache
+
+    @property
+    def decode_cache(self):
+        """ DecodeCache: the decode cache of this curve, or None """
+        return self._decode_cache
+
+    def _sqrt_setup(self):
+        """ Selects and precomputes the square root method of the field """
+        p = self.field
+        if p%4 == 3:
+            self._sqrt_method = 0
+            self._sqrt_consts = ((p+1)//4,)
+        elif p%8 == 5:
+            self._sqrt_method = 1
+            self._sqrt_consts = ((p-5)//8,)
+        else:
+            s = ((p-1)&(1-p)).bit_length()-1
+            q = (p-1)>>s
+            z = 2
+            while pow(z,(p-1)//2,p) == 1:
+                z = z+1
+            self._sqrt_method = 2
+            self._sqrt_consts = (s, q, pow(z,q,p))
+
+    def _field_sqrt(self, n, sign=0):
+        """ Square root in the curve field, with the method chosen at curve
+        construction:
+
+           - p = 3 mod 4: r = n^((p+1)/4)
+           - p = 5 mod 8: Atkin, t = (2n)^((p-5)/8), r = n*t*(2n*t^2-1)
+           - else: Tonelli-Shanks with precomputed 2-adic decomposition of p-1
+             and non residue
+
+        Non residues are detected on the result rather than with a prior
+        Euler criterion.
+
+        Args:
+            n (int): value
+            sign (int): parity of the returned root
+
+        Returns:
+           int: square root of n, or None if n is not a square
+        """
+        p = self.field
+        n = n%p
+        if n == 0:
+            return 0
+        method = self._sqrt_method
+        if method == 0:
+            r = pow(n,self._sqrt_consts[0],p)
+        elif method == 1:
+            n2 = (2*n)%p
+            t = pow(n2,self._sqrt_consts[0],p)
+            r = (n*t*(n2*t*t-1))%p
+        else:
+            m,q,c = self._sqrt_consts
+            r = pow(n,(q+1)//2,p)
+            t = pow(n,q,p)
+            while t != 1:
+                i = 0
+                t2 = t
+                while t2 != 1:
+                    t2 = (t2*t2)%p
+                    i = i+1
+                    if i == m:
+                        return None
+                b = pow(c,1<<(m-i-1),p)
+                r = (r*b)%p
+                c = (b*b)%p
+                t = (t*c)%p
+                m = i
+        if (r*r)%p != n:
+            return None
+        if (r&1) != (1 if sign else 0):
+            r = p-r
+        return int(r)
 
     @staticmethod
     def _sqrt(n,p,sign=0):
@@ -263,7 +973,7 @@ class Curve:
             sign = 1
         if r &1 != sign:
             r = p-r
-        return r
+        return int(r)
 
     
 class WeierstrassCurve(Curve):
@@ -292,6 +1002,13 @@ class WeierstrassCurve(Curve):
         self._domain = {}        
         self._set(domain, ('name','type', 'size',
                               'a','b','field','generator','order','cofactor'))
+        #specialized doubling for a=0 and a=-3 curves
+        a = self.a%self.field
+        if a == 0:
+            self._dbl_jac = self._dbl_jac_a0
+        elif a == self.field-3:
+            self._dbl_jac = self._dbl_jac_am3
+        self._glv_params = False
 
     
     def is_on_curve(self, P):
@@ -316,35 +1033,126 @@ class WeierstrassCurve(Curve):
             Px,Py,Pz = self._aff2jac(P.x,P.y, q)
             Qx,Qy,Qz = self._aff2jac(Q.x,Q.y, q)            
             x,y,z = self._add_jac(Px,Py,Pz, Qx,Qy,Qz, q)        
-        x,y = self._jac2aff(x,y,z, q)
-        PQ = Point(x,y, self)
-        return PQ
+        return self._proj_to_point((x,y,z))
 
         
-    def mul_point(self, k, P):
+    def mul_point(self, k, P, mode="ladder"):
         """ See :func:`Curve.mul_point` """
+        table = self._fixed_base(P)
+        if table is not None:
+            return table.mul(k)
+        if mode == "wnaf":
+            return self._proj_to_point(self._mul_wnaf(k, P))
+        if mode != "ladder":
+            raise ECPyException("Unsupported multiplication mode: %s"%mode)
+        return self._proj_to_point(self._mul_ladder(k, self._proj_from(P)), True)
+
+    def _mul_ladder(self, k, R):
+        """ Montgomery ladder over Jacobian coordinates """
+        if k == 0:
+            return self._proj_zero()
         q = self.field
         a = self.a
-        x1,y1,z1 = self._aff2jac(P.x,P.y, q)
-        k = bin(k)
-        k = k[2:]
-        sz = len(k)
+        x1,y1,z1 = R
+        sz = k.bit_length()
         x2,y2,z2 = self._dbl_jac(x1,y1,z1, q,a)
-        for i in range(1, sz):
-            if k[i] == '1' :
+        for i in range(sz-2, -1, -1):
+            if (k>>i) & 1 :
                 x1,y1,z1 = self._add_jac(x2,y2,z2, x1,y1,z1, q)
                 x2,y2,z2 = self._dbl_jac(x2,y2,z2, q,a)
             else:
                 x2,y2,z2 = self._add_jac(x1,y1,z1, x2,y2,z2, q)
                 x1,y1,z1 = self._dbl_jac(x1,y1,z1, q,a)
-        x,y = self._jac2aff(x1,y1,z1, q)
-        return Point(x,y,self)
+        return (x1,y1,z1)
+
+    def _glv(self):
+        """ Returns the GLV parameters (beta,lambda, a1,b1, a2,b2) of the
+        curve, or None when it has no such endomorphism.
+
+        On a=0 curves with p = 1 mod 3, (x,y) -> (beta*x,y) is lambda*P,
+        beta and lambda being cubic roots of unity modulo p and n. The
+        decomposition basis (a1,b1),(a2,b2) is given by the extended
+        Euclidean algorithm on (n,lambda), see *Guide to Elliptic Curve
+        Cryptography*, algorithm 3.74.
+
+        Parameters are derived on first use and cached.
+        """
+        if self._glv_params is not False:
+            return self._glv_params
+        self._glv_params = None
+        p = self.field
+        n = self.order
+        if (self.a%p != 0 or self.cofactor != 1 or
+            p%3 != 1 or n%3 != 1):
+            return None
+        beta = self._cubic_root_of_unity(p)
+        lam  = self._cubic_root_of_unity(n)
+        G = self.generator
+        for l in (lam, (lam*lam)%n):
+            R = self._proj_to_point(self._mul_ladder(l, self._proj_from(G)))
+            if R.y == G.y and R.x == (beta*G.x)%p:
+                lam = l
+                break
+        else:
+            return None
+        #s_i*n + t_i*lambda = r_i, stop at the first r_i < sqrt(n)
+        r0,t0 = n,0
+        r1,t1 = lam,1
+        while r1*r1 >= n:
+            q = r0//r1
+            r0,t0, r1,t1 = r1,t1, r0-q*r1,t0-q*t1
+        a1,b1 = r1,-t1
+        q = r0//r1
+        r2,t2 = r0-q*r1, t0-q*t1
+        if r0*r0+t0*t0 <= r2*r2+t2*t2:
+            a2,b2 = r0,-t0
+        else:
+            a2,b2 = r2,-t2
+        self._glv_params = (beta,lam, a1,b1, a2,b2)
+        return self._glv_params
+
+    @staticmethod
+    def _cubic_root_of_unity(p):
+        g = 2
+        while True:
+            r = pow(g,(p-1)//3,p)
+            if r != 1:
+                return r
+            g += 1
+
+    def _glv_split(self, k):
+        """ Returns k1,k2 such that k = k1+k2*lambda mod n, both of
+        about half the size of n """
+        beta,lam, a1,b1, a2,b2 = self._glv()
+        n = self.order
+        k = k%n
+        c1 = (2*b2*k+n)//(2*n)
+        c2 = (-2*b1*k+n)//(2*n)
+        k1 = k-c1*a1-c2*a2
+        k2 = -c1*b1-c2*b2
+        return k1,k2
+
+    def _endo_split(self, scalars, Rs):
+        glv = self._glv()
+        if glv is None:
+            return None
+        beta = glv[0]
+        q = self.field
+        ks = []
+        Ss = []
+        for k,R in zip(scalars,Rs):
+            k1,k2 = self._glv_split(k)
+            ks.append(k1)
+            Ss.append(R)
+            ks.append(k2)
+            Ss.append(((beta*R[0])%q,R[1],R[2]))
+        return ks,Ss
 
     def y_recover(self,x,sign=0):
         """ """
         p  = self.field
         y2 = (x*x*x + self.a*x + self.b)%p
-        y  = self._sqrt(y2,p,sign)
+        y  = self._field_sqrt(y2,sign)
         return y
 
     def encode_point(self, P, compressed=False):
@@ -368,7 +1176,7 @@ class WeierstrassCurve(Curve):
         enc.extend(y)
         return enc
 
-    def decode_point(self, eP):
+    def _decode_point(self, eP):
         """ Decodes a point P according to *P1363-2000*.
         
         Args:
@@ -383,6 +1191,8 @@ class WeierstrassCurve(Curve):
             x = xy[1:1+size]
             x = int.from_bytes(x,'big')
             y = self.y_recover(x,xy[1+size])  
+            if y is None:
+                raise ECPyException("Invalid encoded point")
         elif xy[0] == 4:
             x = xy[1:1+size]
             x = int.from_bytes(x,'big')    
@@ -391,16 +1201,82 @@ class WeierstrassCurve(Curve):
         else:
             raise ECPyException("Invalid encoded point")
         
-        return Point(x,y,self,False)
-        
-        
+        return Point(x,y,self)
+
+    # Projective (Jacobian) interface used by the scalar multiplication engines
+
+    def _proj_zero(self):
+        return (1,1,0)
+
+    def _proj_from(self, P):
+        return self._aff2jac(P.x,P.y, self.field)
+
+    def _proj_add(self, R, S):
+        return self._sadd_jac(R[0],R[1],R[2], S[0],S[1],S[2], self.field,self.a)
+
+    def _proj_dbl(self, R):
+        return self._dbl_jac(R[0],R[1],R[2], self.field,self.a)
+
+    def _proj_neg(self, R):
+        return (R[0],(-R[1])%self.field,R[2])
+
+    def _proj_normalize_many(self, Rs, secret=False):
+        q = self.field
+        invs = batch_inverse([R[2] for R in Rs], q, secret)
+        out = []
+        for R,invz in zip(Rs,invs):
+            if invz == 0:
+                out.append(R)
+            else:
+                sqinvz = (invz*invz)%q
+                out.append(((R[0]*sqinvz)%q,(R[1]*sqinvz*invz)%q,1))
+        return out
+
+    def _proj_to_point(self, R, secret=False):
+        if R[2]%self.field == 0:
+            raise ECPyException("Point at infinity")
+        x,y = self._jac2aff(R[0],R[1],R[2], self.field, secret)
+        return _trusted_point(x,y,self)
+
+    # Mixed addition: precomputed operands are kept affine, None being
+    # the point at infinity
+
+    def _proj_prep_many(self, Rs):
+        return [None if R[2] == 0 else (R[0],R[1])
+                for R in self._proj_normalize_many(Rs)]
+
+    def _point_prep(self, P):
+        return (P.x,P.y)
+
+    def _prep_neg(self, e):
+        if e is None:
+            return None
+        return (e[0],(-e[1])%self.field)
+
+    def _proj_madd(self, R, e):
+        if e is None:
+            return R
+        return self._madd_jac(R[0],R[1],R[2], e[0],e[1], self.field,self.a)
+
+    def _proj_eq(self, R, S):
+        q = self.field
+        X1,Y1,Z1 = R
+        X2,Y2,Z2 = S
+        if Z1 == 0 or Z2 == 0:
+            return Z1 == Z2
+        Z1Z1 = (Z1*Z1)%q
+        Z2Z2 = (Z2*Z2)%q
+        return ((X1*Z2Z2-X2*Z1Z1)%q == 0 and
+                (Y1*Z2*Z2Z2-Y2*Z1*Z1Z1)%q == 0)
+
+
     @staticmethod
     def _aff2jac(x,y, q):
         return(x,y,1)
     
     @staticmethod
-    def _jac2aff(x,y,z, q):
-        invz = pow(z,q-2,q)
+    def _jac2aff(x,y,z, q, secret=False):
+        invz = inv_mod(z,q,secret)
         sqinvz = (invz*invz)%q
         x = (x*sqinvz)%q
         y = (y*sqinvz*invz)%q
@@ -420,6 +1296,31 @@ class WeierstrassCurve(Curve):
         Y3   = (M*(S-T)-8*YYYY)%q
         Z3   = ((Y1+Z1)*(Y1+Z1)-YY-ZZ)%q
         return X3,Y3,Z3
+
+    @staticmethod
+    def _dbl_jac_a0(X1,Y1,Z1, q, a):
+        """ Doubling for a=0 curves (dbl-2009-l) """
+        A  = (X1*X1)%q
+        B  = (Y1*Y1)%q
+        C  = (B*B)%q
+        D  = (2*((X1+B)*(X1+B)-A-C))%q
+        E  = 3*A
+        X3 = (E*E-2*D)%q
+        Y3 = (E*(D-X3)-8*C)%q
+        Z3 = (2*Y1*Z1)%q
+        return X3,Y3,Z3
+
+    @staticmethod
+    def _dbl_jac_am3(X1,Y1,Z1, q, a):
+        """ Doubling for a=-3 curves (dbl-2001-b) """
+        delta = (Z1*Z1)%q
+        gamma = (Y1*Y1)%q
+        beta  = (X1*gamma)%q
+        alpha = (3*(X1-delta)*(X1+delta))%q
+        X3 = (alpha*alpha-8*beta)%q
+        Z3 = ((Y1+Z1)*(Y1+Z1)-gamma-delta)%q
+        Y3 = (alpha*(4*beta-X3)-8*gamma*gamma)%q
+        return X3,Y3,Z3
         
     @staticmethod
     def _add_jac(X1,Y1,Z1, X2,Y2,Z2, q):
@@ -439,6 +1340,60 @@ class WeierstrassCurve(Curve):
         Z3   = (((Z1+Z2)*(Z1+Z2)-Z1Z1-Z2Z2)*H)%q
         return X3,Y3,Z3
 
+    @staticmethod
+    def _madd_jac(X1,Y1,Z1, X2,Y2, q, a):
+        """ Mixed addition (madd-2007-bl), second operand being affine.
+            Handles the point at infinity and the P==Q and P==-Q cases.
+        """
+        if Z1 == 0:
+            return X2,Y2,1
+        Z1Z1 = (Z1*Z1)%q
+        U2   = (X2*Z1Z1)%q
+        S2   = (Y2*Z1*Z1Z1)%q
+        H    = (U2-X1)%q
+        r    = (2*(S2-Y1))%q
+        if H == 0:
+            if r == 0:
+                return WeierstrassCurve._dbl_jac(X2,Y2,1, q,a)
+            return 1,1,0
+        HH   = (H*H)%q
+        I    = (4*HH)%q
+        J    = (H*I)%q
+        V    = (X1*I)%q
+        X3   = (r*r-J-2*V)%q
+        Y3   = (r*(V-X3)-2*Y1*J)%q
+        Z3   = ((Z1+H)*(Z1+H)-Z1Z1-HH)%q
+        return X3,Y3,Z3
+
+    @staticmethod
+    def _sadd_jac(X1,Y1,Z1, X2,Y2,Z2, q, a):
+        """ Same as _add_jac, but handles the point at infinity (Z=0)
+            and the P==Q and P==-Q cases.
+        """
+        if Z1 == 0:
+            return X2,Y2,Z2
+        if Z2 == 0:
+            return X1,Y1,Z1
+        Z1Z1 = (Z1*Z1)%q
+        Z2Z2 = (Z2*Z2)%q
+        U1   = (X1*Z2Z2)%q
+        U2   = (X2*Z1Z1)%q
+        S1   = (Y1*Z2*Z2Z2)%q
+        S2   = (Y2*Z1*Z1Z1)%q
+        H    = (U2-U1)%q
+        r    = (2*(S2-S1))%q
+        if H == 0:
+            if r == 0:
+                return WeierstrassCurve._dbl_jac(X1,Y1,Z1, q,a)
+            return 1,1,0
+        I    = ((2*H)*(2*H))%q
+        J    = (H*I)%q
+        V    = (U1*I)%q
+        X3   = (r*r-J-2*V)%q
+        Y3   = (r*(V-X3)-2*S1*J)%q
+        Z3   = (((Z1+Z2)*(Z1+Z2)-Z1Z1-Z2Z2)*H)%q
+        return X3,Y3,Z3
+
 
 class TwistedEdwardCurve(Curve):
     """An elliptic curve defined by the equation: a*x²+y²=1+d*x²*y² 
@@ -451,6 +1406,7 @@ class TwistedEdwardCurve(Curve):
               - field (inf)        : field value 
               - generator (int[2]) : x,y coordinate of generator
               - order (int)        : order of generator
+              - cofactor (int)     : cofactor
 
         *Note*: you should not use the constructor and only use :func:`Curve.get_curve`
         builder to ensure using supported curve.
@@ -463,7 +1419,27 @@ class TwistedEdwardCurve(Curve):
         """ Built an new short twisted Edward curve with the provided parameters.  """
         self._domain = {}
         self._set(domain, ('name','type','size',
-                              'a','d','field','generator','order'))
+                              'a','d','field','generator','order','cofactor'))
+        #a=-1 allows mixed additions with (y+x,y-x,2dxy) Niels operands
+        self._niels = (self.a%self.field) == self.field-1
+        #specialized formulas for a=-1 (Ed25519) and a=1 (Ed448)
+        if self._niels:
+            self._d2 = (2*self.d)%self.field
+            self._dbl_ext = self._dbl_ext_am1
+            self._add_ext = self._add_ext_am1
+            self._proj_add = self._proj_add_am1
+        elif self.a%self.field == 1:
+            self._dbl_ext  = self._dbl_ext_a1
+            self._add_ext  = self._add_ext_a1
+            self._uadd_ext = self._uadd_ext_a1
+            self._madd_ext = self._madd_ext_a1
+        #sqrt_ratio constants
+        q = self.field
+        if q%8 == 5:
+            self._sqrt_exp = (q-5)//8
+            self._sqrtm1   = pow(2,(q-1)//4,q)
+        elif q%4 == 3:
+            self._sqrt_exp = (q-3)//4
 
     def _coord_size(self):
         if self.name == 'Ed25519':
@@ -485,55 +1461,65 @@ class TwistedEdwardCurve(Curve):
         right = (1+self.d*sqx*sqy)%q
         return left == right
     
+    def sqrt_ratio(self, u, v):
+        """ Returns a square root of u/v with a single exponentiation.
+
+        For p = 5 mod 8 (Ed25519), x = u*v^3*(u*v^7)^((p-5)/8), multiplied
+        by sqrt(-1) when v*x^2 = -u.
+        For p = 3 mod 4 (Ed448), x = u^3*v*(u^5*v^3)^((p-3)/4).
+        Other fields invert v and use the generic square root.
+
+        Args:
+            u (int): numerator
+            v (int): denominator, not 0
+
+        Returns:
+           int: x such that v*x^2 = u, or None if u/v is not a square
+        """
+        q = self.field
+        if q%8 == 5:
+            v3 = (v*v*v)%q
+            x = (u*v3*pow(u*v3*v3*v,self._sqrt_exp,q))%q
+            vxx = (v*x*x)%q
+            if vxx != u%q:
+                if vxx != (-u)%q:
+                    return None
+                x = (x*self._sqrtm1)%q
+            return int(x)
+        if q%4 == 3:
+            uu = (u*u)%q
+            v3 = (v*v*v)%q
+            x = (uu*u*v*pow(uu*uu*u*v3,self._sqrt_exp,q))%q
+            if (v*x*x-u)%q != 0:
+                return None
+            return int(x)
+        return self._field_sqrt(u*inv_mod(v,q))
+
     def x_recover(self, y, sign=0):        
         """ Retrieves the x coordinate according to the y one, \
             such that point (x,y) is on curve.
+
+        Over F(q), a.xx+yy = 1+d.xx.yy, so x = +-sqrt((1-yy)/(a-d.yy)),
+        see :func:`sqrt_ratio`.
         
         Args:
             y (int): y coordinate
             sign (int): sign of x
 
         Returns:
-           int: the computed x coordinate
+           int: the computed x coordinate, or None if there is none
         """
         q = self.field
-        a = self.a
-        d = self.d
+        yy = (y*y)%q
+        x = self.sqrt_ratio(1-yy, self.a-self.d*yy)
+        if x is None:
+            return None
         if sign:
+            if x == 0:
+                return None
             sign = 1
-        
-        # #x2 = (y^2-1) * (d*y^2-a)^-1
-        yy = (y*y)%q
-        u = (1-yy)%q
-        v = pow(a-d*yy,q-2,q)
-        xx = (u*v)%q
-        if self.name =='Ed25519':
-            x = pow(xx,(q+3)//8,q)
-            if (x*x - xx) % q != 0:
-                I = pow(2,(q-1)//4,q)
-                x = (x*I) % q
-        elif self.name =='Ed448':
-            x = pow(xx,(q+1)//4,q)      
-        else:
-            assert False, '%s not supported'%curve.name
-
         if x &1 != sign:
             x = q-x
-
-        assert (x*x)%q == xx
-
-
-        # over F(q):
-        #     a.xx +yy = 1+d.xx.yy
-        # <=> xx(a-d.yy) = 1-yy
-        # <=> xx = (1-yy)/(a-d.yy)
-        # <=> x = +- sqrt((1-yy)/(a-d.yy))
-        # yy   = (y*y)%q
-        # u    = (1-yy)%q
-        # v    = (a - d*yy)%q
-        # v_1 = pow(v, q-2,q)
-        # xx = (v_1*u)%q
-        # x = self._sqrt(xx,q,sign) # Inherited generic Tonelli–Shanks from Curve 
         return x
 
     def encode_point(self, P):
@@ -552,7 +1538,7 @@ class TwistedEdwardCurve(Curve):
             y[len(y)-1] |= 0x80
         return bytes(y)
 
-    def decode_point(self, eP):
+    def _decode_point(self, eP):
         """ Decodes a point P according to *draft_irtf-cfrg-eddsa-04*.
         
         Args:
@@ -565,10 +1551,17 @@ class TwistedEdwardCurve(Curve):
         sign = y[len(y)-1] & 0x80
         y[len(y)-1] &= ~0x80
         y = int.from_bytes(y,'little')    
+        if y >= self.field:
+            raise ECPyException("Invalid encoded point")
         x = self.x_recover(y,sign)
+        if x is None:
+            raise ECPyException("Invalid encoded point")
         return Point(x,y,self,True)
 
     
+    def _neg_point(self, P):
+        return _trusted_point(self.field-P.x,P.y,self)
+
     def add_point(self,P,Q):
         """ See :func:`Curve.add_point` """
         q = self.field
@@ -581,26 +1574,104 @@ class TwistedEdwardCurve(Curve):
             Qx,Qy,Qz,Qt = self._aff2ext(Q.x,Q.y, q)
             x,y,z,t     = self._add_ext(Px,Py,Pz,Pt, Qx,Qy,Qz,Qt, q,a)
         x,y = self._ext2aff(x,y,z,t, q)
-        return Point(x,y, self)
+        return _trusted_point(x,y, self)
 
-    def mul_point(self, k, P):
-        """ See :func:`Curve.add_point` """
+    def mul_point(self, k, P, mode="ladder"):
+        """ See :func:`Curve.mul_point` """
+        table = self._fixed_base(P)
+        if table is not None:
+            return table.mul(k)
+        if mode == "wnaf":
+            return self._proj_to_point(self._mul_wnaf(k, P))
+        if mode != "ladder":
+            raise ECPyException("Unsupported multiplication mode: %s"%mode)
+        return self._proj_to_point(self._mul_ladder(k, self._proj_from(P)), True)
+
+    def _mul_ladder(self, k, R):
+        """ Montgomery ladder over extended coordinates """
+        if k == 0:
+            return self._proj_zero()
         q = self.field
         a = self.a
-        x1,y1,z1,t1 = self._aff2ext(P.x,P.y, q)
-        k = bin(k)
-        k = k[2:]
-        sz = len(k)
+        x1,y1,z1,t1 = R
+        sz = k.bit_length()
         x2,y2,z2,t2 = self._dbl_ext(x1,y1,z1,t1, q,a)
-        for i in range(1, sz):
-            if k[i] == '1' :
+        for i in range(sz-2, -1, -1):
+            if (k>>i) & 1 :
                 x1,y1,z1,t1 = self._add_ext(x2,y2,z2,t2, x1,y1,z1,t1, q,a)
                 x2,y2,z2,t2 = self._dbl_ext(x2,y2,z2,t2, q,a)
             else:
                 x2,y2,z2,t2 = self._add_ext(x1,y1,z1,t1, x2,y2,z2,t2, q,a)
                 x1,y1,z1,t1 = self._dbl_ext(x1,y1,z1,t1, q,a)
-        x,y = self._ext2aff(x1,y1,z1,t1, q)
-        return Point(x,y,self)
+        return (x1,y1,z1,t1)
+
+    # Projective (extended) interface used by the scalar multiplication engines
+
+    def _proj_zero(self):
+        return (0,1,1,0)
+
+    def _proj_from(self, P):
+        return self._aff2ext(P.x,P.y, self.field)
+
+    def _proj_add(self, R, S):
+        return self._uadd_ext(R[0],R[1],R[2],R[3], S[0],S[1],S[2],S[3],
+                              self.field,self.a,self.d)
+
+    def _proj_add_am1(self, R, S):
+        return self._uadd_ext_am1(R[0],R[1],R[2],R[3], S[0],S[1],S[2],S[3],
+                                  self.field,self._d2)
+
+    def _proj_dbl(self, R):
+        return self._dbl_ext(R[0],R[1],R[2],R[3], self.field,self.a)
+
+    def _proj_neg(self, R):
+        q = self.field
+        return ((-R[0])%q,R[1],R[2],(-R[3])%q)
+
+    def _proj_normalize_many(self, Rs, secret=False):
+        q = self.field
+        invs = batch_inverse([R[2] for R in Rs], q, secret)
+        out = []
+        for R,invz in zip(Rs,invs):
+            x = (R[0]*invz)%q
+            y = (R[1]*invz)%q
+            out.append((x,y,1,(x*y)%q))
+        return out
+
+    def _proj_to_point(self, R, secret=False):
+        x,y = self._ext2aff(R[0],R[1],R[2],R[3], self.field, secret)
+        return _trusted_point(x,y,self)
+
+    # Mixed addition: precomputed operands are normalized, either as
+    # (y+x,y-x,2dxy) Niels triples when a=-1, or as (x,y,dxy) else.
+
+    def _aff2prep(self, x, y):
+        q = self.field
+        if self._niels:
+            return ((y+x)%q,(y-x)%q,(2*self.d*x*y)%q)
+        return (x,y,(self.d*x*y)%q)
+
+    def _proj_prep_many(self, Rs):
+        return [self._aff2prep(R[0],R[1]) for R in self._proj_normalize_many(Rs)]
+
+    def _point_prep(self, P):
+        return self._aff2prep(P.x,P.y)
+
+    def _prep_neg(self, e):
+        q = self.field
+        if self._niels:
+            return (e[1],e[0],(-e[2])%q)
+        return ((-e[0])%q,e[1],(-e[2])%q)
+
+    def _proj_madd(self, R, e):
+        if self._niels:
+            return self._madd_niels(R[0],R[1],R[2],R[3], e[0],e[1],e[2], self.field)
+        return self._madd_ext(R[0],R[1],R[2],R[3], e[0],e[1],e[2], self.field,self.a)
+
+    def _proj_eq(self, R, S):
+        q = self.field
+        return ((R[0]*S[2]-S[0]*R[2])%q == 0 and
+                (R[1]*S[2]-S[1]*R[2])%q == 0)
 
     
     @staticmethod
@@ -612,8 +1683,8 @@ class TwistedEdwardCurve(Curve):
         return (x,y,z,t)
     
     @staticmethod
-    def _ext2aff(x,y,z,xy, q):
-        invz = pow(z,q-2,q)
+    def _ext2aff(x,y,z,xy, q, secret=False):
+        invz = inv_mod(z,q,secret)
         x = (x*invz)%q
         y = (y*invz)%q
         return (x,y)
@@ -654,7 +1725,183 @@ class TwistedEdwardCurve(Curve):
         XY3 = (E*H)%q
         Z3 = (F*G)%q
         return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _uadd_ext(X1,Y1,Z1,XY1,  X2,Y2,Z2,XY2, q,a,d):
+        """ Unified addition (add-2008-hwcd), also valid for P==Q and the
+            neutral point on complete curves.
+        """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (d*XY1*XY2)%q
+        D = (Z1*Z2)%q
+        E = ((X1+Y1)*(X2+Y2)-A-B)%q
+        F = (D-C)%q
+        G = (D+C)%q
+        H = (B-a*A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
         
+
+    @staticmethod
+    def _madd_niels(X1,Y1,Z1,XY1, YpX2,YmX2,XY2d2, q):
+        """ Mixed unified addition for a=-1 (madd-2008-hwcd-3), second
+            operand being (y+x,y-x,2dxy)
+        """
+        A = ((Y1-X1)*YmX2)%q
+        B = ((Y1+X1)*YpX2)%q
+        C = (XY1*XY2d2)%q
+        D = (2*Z1)%q
+        E = (B-A)%q
+        F = (D-C)%q
+        G = (D+C)%q
+        H = (B+A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _madd_ext(X1,Y1,Z1,XY1, X2,Y2,XY2d, q,a):
+        """ Mixed unified addition (madd-2008-hwcd), second operand
+            being (x,y,dxy)
+        """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (XY1*XY2d)%q
+        E = ((X1+Y1)*(X2+Y2)-A-B)%q
+        F = (Z1-C)%q
+        G = (Z1+C)%q
+        H = (B-a*A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    # a=-1 formulas, used by Ed25519
+
+    @staticmethod
+    def _dbl_ext_am1(X1,Y1,Z1,XY1, q,a):
+        """ dbl-2008-hwcd with a=-1 """
+        A  = (X1*X1)%q
+        B  = (Y1*Y1)%q
+        C  = (2*Z1*Z1)%q
+        E  = ((X1+Y1)*(X1+Y1)-A-B)%q
+        G  = (B-A)%q
+        F  = (G-C)%q
+        H  = (-A-B)%q
+        X3  = (E*F)%q
+        Y3  = (G*H)%q
+        XY3 = (E*H)%q
+        Z3  = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _add_ext_am1(X1,Y1,Z1,XY1,  X2,Y2,Z2,XY2, q,a):
+        """ Same as _add_ext with a=-1 """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (Z1*XY2)%q
+        D = (XY1*Z2)%q
+        E = (D+C)%q
+        F = ((X1-Y1)*(X2+Y2)+B-A)%q
+        G = (B-A)%q
+        H = (D-C)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _uadd_ext_am1(X1,Y1,Z1,XY1,  X2,Y2,Z2,XY2, q,d2):
+        """ Unified addition for a=-1 (add-2008-hwcd-3), d2 being 2*d """
+        A = ((Y1-X1)*(Y2-X2))%q
+        B = ((Y1+X1)*(Y2+X2))%q
+        C = (XY1*d2*XY2)%q
+        D = (2*Z1*Z2)%q
+        E = (B-A)%q
+        F = (D-C)%q
+        G = (D+C)%q
+        H = (B+A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    # a=1 (untwisted) formulas, used by Ed448
+
+    @staticmethod
+    def _dbl_ext_a1(X1,Y1,Z1,XY1, q,a):
+        """ dbl-2008-hwcd with a=1 """
+        A  = (X1*X1)%q
+        B  = (Y1*Y1)%q
+        C  = (2*Z1*Z1)%q
+        E  = ((X1+Y1)*(X1+Y1)-A-B)%q
+        G  = (A+B)%q
+        F  = (G-C)%q
+        H  = (A-B)%q
+        X3  = (E*F)%q
+        Y3  = (G*H)%q
+        XY3 = (E*H)%q
+        Z3  = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _add_ext_a1(X1,Y1,Z1,XY1,  X2,Y2,Z2,XY2, q,a):
+        """ Same as _add_ext with a=1 """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (Z1*XY2)%q
+        D = (XY1*Z2)%q
+        E = (D+C)%q
+        F = ((X1-Y1)*(X2+Y2)+B-A)%q
+        G = (B+A)%q
+        H = (D-C)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _uadd_ext_a1(X1,Y1,Z1,XY1,  X2,Y2,Z2,XY2, q,a,d):
+        """ Same as _uadd_ext with a=1 """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (d*XY1*XY2)%q
+        D = (Z1*Z2)%q
+        E = ((X1+Y1)*(X2+Y2)-A-B)%q
+        F = (D-C)%q
+        G = (D+C)%q
+        H = (B-A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
+
+    @staticmethod
+    def _madd_ext_a1(X1,Y1,Z1,XY1, X2,Y2,XY2d, q,a):
+        """ Same as _madd_ext with a=1 """
+        A = (X1*X2)%q
+        B = (Y1*Y2)%q
+        C = (XY1*XY2d)%q
+        E = ((X1+Y1)*(X2+Y2)-A-B)%q
+        F = (Z1-C)%q
+        G = (Z1+C)%q
+        H = (B-A)%q
+        X3 = (E*F)%q
+        Y3 = (G*H)%q
+        XY3 = (E*H)%q
+        Z3 = (F*G)%q
+        return (X3,Y3,Z3,XY3)
       
 class MontgomeryCurve(Curve):
     """An elliptic curve defined by the equation: b.y²=x³+a*x²+x.  
@@ -701,7 +1948,7 @@ class MontgomeryCurve(Curve):
         """ """
         p  = self.field
         y2 = (x*x*x + self.a*x*x + x)%p
-        y  = self._sqrt(y2,p,sign)
+        y  = self._field_sqrt(y2,sign)
         return y
      
     def encode_point(self, P):
@@ -717,7 +1964,7 @@ class MontgomeryCurve(Curve):
         x = bytearray(P.x.to_bytes(size,'little'))
         return bytes(x)
 
-    def decode_point(self, eP):
+    def _decode_point(self, eP):
         """ Decodes a point P according to *RFC7748*.
         
         Args:
@@ -731,10 +1978,10 @@ class MontgomeryCurve(Curve):
         x = int.from_bytes(x,'little')    
         return Point(x,None,self)
 
-    def mul_point(self,k,P):
-        """ See :func:`Curve.add_point` """
+    def mul_point(self,k,P,mode="ladder"):
+        """ See :func:`Curve.mul_point`, the x-only ladder is always used """
         x = self._mul_point_x(k,P.x)
-        return Point(x,None, P.curve)
+        return _trusted_point(x,None, P.curve)
     
     def _mul_point_x(self, k, u):
         """  """        
@@ -755,7 +2002,7 @@ class MontgomeryCurve(Curve):
             else:
                 x2,z2, x3,z3 = self._ladder_step(x1, x2,z2, x3,z3) 
         p = self.field
-        zinv = pow(z2,(p - 2),p)
+        zinv = inv_mod(z2,p,True)
         ku = (x2*zinv)%p
         return ku
 
@@ -780,7 +2027,7 @@ class MontgomeryCurve(Curve):
         return (x_2p, z_2p, x_pq, z_pq)
 
 
-class Point:
+class Point(object):
     """Immutable Elliptic Curve Point.
 
     A Point support the following operator:
@@ -788,6 +2035,9 @@ class Point:
         - `+` : Point Addition, with automatic doubling support.
         - `*` : Scalar multiplication, can write as k*P or P*k, with P :class:Point and  k :class:int
         - `==`: Point comparison
+
+    Points are hashable, the hash depending on the curve name and
+    coordinates, see also :func:`Curve.intern_point`.
     
     Attributes:
         x (int)       : Affine x coordinate 
@@ -830,17 +2080,20 @@ class Point:
         return self._curve
         
     def __neg__(self):
-        curve = self.curve
-        return Point(self.x,curve.field-self.y,curve)
+        return self.curve._neg_point(self)
     
     def __add__(self, Q):
         if isinstance(Q,Point) :
             return self.curve.add_point(self,Q)
+        if isinstance(Q,ProjectivePoint) :
+            return self.to_projective()+Q
         raise NotImplementedError('__add__: type not supported: %s'%type(Q))
 
     def __sub__(self, Q):
         if isinstance(Q,Point) :
             return self.curve.sub_point(self,Q)
+        if isinstance(Q,ProjectivePoint) :
+            return self.to_projective()-Q
         raise NotImplementedError('__sub__: type not supported: %s'%type(Q))
 
     def __mul__(self, scal):
@@ -858,8 +2111,14 @@ class Point:
                      Q._curve.name    == None ) and
                     self._x == Q._x and
                     self._y == Q._y)
+        if isinstance(Q,ProjectivePoint) :
+            return Q == self
         raise NotImplementedError('eq: type not supported: %s'%(type(Q)))
 
+    def __hash__(self):
+        return hash((self._curve.name,
+                     getattr(self,'_x',0), getattr(self,'_y',0)))
+
     def __str__(self):
         return "x: %x\n  y: %x" % (self._x,self._y)
 
@@ -878,6 +2137,10 @@ class Point:
     def eq(self,Q):
         return self.__eq__(Q)
 
+    def to_projective(self):
+        """ Returns this point as a :class:`ProjectivePoint` """
+        return ProjectivePoint(self._curve._proj_from(self), self._curve)
+
     def serialize(self, compressed=True):
         size = self.curve.size >> 3
         first = self.x.to_bytes(size, "big")
@@ -890,6 +2153,381 @@ class Point:
             return b"\x01" + first + last
 
 
+def _trusted_point(x, y, curve):
+    """ Builds a Point computed by the curve formulas from valid points.
+
+    Same as Point(x,y,curve) without the on-curve check, which is only
+    needed for external data (user construction, decode_point). Null
+    coordinates are kept, as the twisted Edward neutral point (0,1).
+    """
+    P = Point.__new__(Point)
+    P._curve = curve
+    if x is not None:
+        P._x = int(x)
+    if y is not None:
+        P._y = int(y)
+    return P
+
+
+class ProjectivePoint:
+    """Elliptic Curve Point kept in projective coordinates.
+
+    Jacobian coordinates are used on short Weierstrass curves and extended
+    ones on twisted Edward curves. Operators are the same as for
+    :class:`Point`, and :class:`Point` operands are accepted, but results
+    stay unnormalized: the modular inversion needed to get back affine
+    coordinates is only paid when `x` or `y` is read, thus when the point
+    is encoded or serialized.
+
+    Equality is checked without normalization.
+
+    Scalar multiplication uses the Montgomery ladder. Its results, and
+    points derived from them, are considered secret: they are normalized
+    with a constant sequence of operations, see :func:`inv_mod`.
+
+    Use :func:`Point.to_projective` to get one.
+
+    Attributes:
+        x (int)       : Affine x coordinate
+        y (int)       : Affine y coordinate
+        curve (Curve) : Curve on which the point is define
+
+    Args:
+        coords (tuple): projective coordinates
+        curve (Curve) : curve on which the point is define
+        secret (bool) : coordinates depend on a secret value
+    """
+
+    __slots__ = '_coords','_curve','_point','_secret'
+
+    def __init__(self, coords, curve, secret=False):
+        self._coords = coords
+        self._curve  = curve
+        self._point  = None
+        self._secret = secret
+
+    @property
+    def x(self):
+        return self.to_point().x
+
+    @property
+    def y(self):
+        return self.to_point().y
+
+    @property
+    def curve(self):
+        return self._curve
+
+    def to_point(self):
+        """ Returns the affine :class:`Point` """
+        if self._point is None:
+            self._point = self._curve._proj_to_point(self._coords, self._secret)
+        return self._point
+
+    def _coords_of(self, Q):
+        if isinstance(Q,ProjectivePoint):
+            return Q._coords
+        if isinstance(Q,Point):
+            return self._curve._proj_from(Q)
+        return None
+
+    def _secret_with(self, Q):
+        return self._secret or getattr(Q,'_secret',False)
+
+    def __neg__(self):
+        return ProjectivePoint(self._curve._proj_neg(self._coords), self._curve,
+                               self._secret)
+
+    def __add__(self, Q):
+        R = self._coords_of(Q)
+        if R is None:
+            raise NotImplementedError('__add__: type not supported: %s'%type(Q))
+        return ProjectivePoint(self._curve._proj_add(self._coords,R), self._curve,
+                               self._secret_with(Q))
+
+    def __radd__(self, Q):
+        return self.__add__(Q)
+
+    def __sub__(self, Q):
+        R = self._coords_of(Q)
+        if R is None:
+            raise NotImplementedError('__sub__: type not supported: %s'%type(Q))
+        curve = self._curve
+        return ProjectivePoint(curve._proj_add(self._coords,curve._proj_neg(R)), curve,
+                               self._secret_with(Q))
+
+    def __mul__(self, scal):
+        if isinstance(scal,int):
+            return ProjectivePoint(self._curve._mul_ladder(scal,self._coords), self._curve,
+                                   True)
+        raise NotImplementedError('__mul__: type not supported: %s'%type(scal))
+
+    def __rmul__(self,scal) :
+        return self.__mul__(scal)
+
+    def __eq__(self,Q):
+        R = self._coords_of(Q)
+        if R is None:
+            raise NotImplementedError('eq: type not supported: %s'%(type(Q)))
+        return ((self._curve.name == Q.curve.name or
+                 self._curve.name == None or
+                 Q.curve.name     == None ) and
+                self._curve._proj_eq(self._coords,R))
+
+    def __hash__(self):
+        return hash(self.to_point())
+
+    def __str__(self):
+        return str(self.to_point())
+
+    def neg(self):
+        return self.__neg__()
+
+    def add(self, Q):
+        return self.__add__(Q)
+
+    def sub(self, Q):
+        return self.__sub__(Q)
+
+    def mul(self, k):
+        return self.__mul__(k)
+
+    def eq(self,Q):
+        return self.__eq__(Q)
+
+    def serialize(self, compressed=True):
+        return self.to_point().serialize(compressed)
+
+
+def _signed_digits(k, w):
+    """ Recodes k>=0 in radix 2^w with digits in [-2^(w-1)+1, 2^(w-1)],
+        least significant digit first.
+    """
+    half  = 1<<(w-1)
+    full  = 1<<w
+    mask  = full-1
+    digits = []
+    while k:
+        d = k & mask
+        k = k >> w
+        if d > half:
+            d = d-full
+            k = k+1
+        digits.append(d)
+    return digits
+
+
+def _wnaf(k, w):
+    """ Returns the width-w NAF of k>=0, least significant digit first.
+
+    Non zero digits are odd, in ]-2^(w-1), 2^(w-1)[, and any w consecutive
+    digits contain at most one of them.
+    """
+    full = 1<<w
+    half = 1<<(w-1)
+    mask = full-1
+    naf  = []
+    while k:
+        #skip the run of trailing zero bits at once
+        z = ((k & -k).bit_length())-1
+        if z:
+            naf.extend([0]*z)
+            k = k >> z
+        d = k & mask
+        if d >= half:
+            d = d-full
+        naf.append(d)
+        k = (k-d) >> 1
+    return naf
+
+
+def _jsf(k0, k1):
+    """ Returns the joint sparse form of k0,k1>=0 as a list of digit
+        pairs (u0,u1) in {-1,0,1}, least significant first.
+
+    At most one column out of two is non zero on average.
+    See Hankerson, Menezes, Vanstone: Guide to ECC, Algorithm 3.50.
+    """
+    jsf = []
+    d0 = 0
+    d1 = 0
+    while k0+d0 > 0 or k1+d1 > 0:
+        l0 = (k0+d0) & 7
+        l1 = (k1+d1) & 7
+        if l0 & 1:
+            u0 = 2-(l0&3)
+            if (l0 == 3 or l0 == 5) and (l1&3) == 2:
+                u0 = -u0
+        else:
+            u0 = 0
+        if l1 & 1:
+            u1 = 2-(l1&3)
+            if (l1 == 3 or l1 == 5) and (l0&3) == 2:
+                u1 = -u1
+        else:
+            u1 = 0
+        if 2*d0 == 1+u0:
+            d0 = 1-d0
+        if 2*d1 == 1+u1:
+            d1 = 1-d1
+        k0 = k0>>1
+        k1 = k1>>1
+        jsf.append((u0,u1))
+    return jsf
+
+
+class FixedBaseTable:
+    """Precomputed multiples of a static point for fast scalar multiplication.
+
+    The scalar is recoded in radix 2^w with odd signed digits in
+    [-(2^w-1), 2^w-1] (Joye-Tunstall regular recoding, the scalar being
+    first made odd by adding the order if needed). Row i of the table holds
+    the normalized points +/-j*2^(w*i)*P for odd j in 1..2^w-1, so that k*P
+    costs exactly one addition per row, without any doubling. As no digit
+    is zero, the sequence of operations does not depend on the scalar,
+    which may be secret.
+
+    Entries are stored in the form expected by the curve mixed addition:
+    affine for short Weierstrass curves, (y+x,y-x,2dxy) for a=-1 twisted
+    Edward ones.
+
+    Tables are usually obtained with :func:`Curve.precompute`. The curve
+    generator gets one automatically on first use.
+
+    Args:
+        P (Point): point to precompute, of order `curve.order`
+        w (int)  : window width
+
+    """
+
+    def __init__(self, P, w=4):
+        curve = P.curve
+        half  = 1<<(w-1)
+        rows  = (2*curve.order).bit_length()//w + 1
+        table = []
+        B = curve._proj_from(P)
+        for i in range(rows):
+            B2  = curve._proj_dbl(B)
+            row = [B]
+            R   = B
+            for j in range(1,half):
+                R = curve._proj_add(R,B2)
+                row.append(R)
+            B = curve._proj_add(R,B)
+            table.append(row)
+        #normalize all entries with a single inversion
+        #each entry is stored with its opposite
+        flat = curve._proj_prep_many([E for row in table for E in row])
+        flat = [(e,curve._prep_neg(e)) for e in flat]
+        table = [flat[i:i+half] for i in range(0,len(flat),half)]
+        self._curve = curve
+        self._w     = w
+        self._table = table
+
+    @property
+    def curve(self):
+        return self._curve
+
+    def mul(self, k):
+        """ Returns k*P
+
+        Args:
+            k (int): scalar to multiply
+
+        Returns:
+            Point: A new Point R = k*P
+        """
+        return self._curve._proj_to_point(self._mul(k), True)
+
+    def _mul(self, k):
+        curve = self._curve
+        table = self._table
+        w     = self._w
+        n     = curve.order
+        k = k % n
+        k = k + n*(1-(k&1))
+        full = 1<<w
+        mask = (full<<1)-1
+        R = curve._proj_zero()
+        for row in table[:-1]:
+            d = (k&mask) - full
+            k = (k-d)>>w
+            R = curve._proj_madd(R, row[abs(d)>>1][d<0])
+        return curve._proj_madd(R, table[-1][k>>1][0])
+
+
+class DecodeCache:
+    """Bounded LRU cache of decoded points, see :func:`Curve.set_decode_cache`.
+
+    The cache is thread safe. Decoding itself runs outside the lock, so two
+    threads may decode the same missing point concurrently.
+
+    Attributes:
+        maxsize (int): maximum number of entries
+        hits (int)   : lookups served from the cache
+        misses (int) : lookups that had to decode
+
+    Args:
+        maxsize (int): maximum number of entries
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ECPyException("Invalid cache size: %s"%maxsize)
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._entries = collections.OrderedDict()
+        self._lock    = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, eP, decode):
+        """ Returns the point encoded by eP, calling decode(eP) on miss.
+
+        Args:
+            eP (bytes)       : encoded point
+            decode (callable): decoding function
+
+        Returns:
+            Point: decoded point
+        """
+        key = self._key(eP)
+        with self._lock:
+            P = self._entries.pop(key, None)
+            if P is not None:
+                self._entries[key] = P
+                self.hits += 1
+                return P
+            self.misses += 1
+        P = decode(key)
+        with self._lock:
+            self._entries[key] = P
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return P
+
+    def clear(self):
+        """ Removes all entries and resets the counters """
+        with self._lock:
+            self._entries.clear()
+            self.hits   = 0
+            self.misses = 0
+
+    @staticmethod
+    def _key(eP):
+        return bytes(bytearray(eP))
+
+
+class _InternPool(DecodeCache):
+    """Bounded LRU pool of points, see :func:`Curve.intern_point`"""
+
+    @staticmethod
+    def _key(P):
+        return P
+
+
 class ECPyException(Exception):
     def __init__(self, value):
         self.value = value
@@ -1349,6 +2987,8 @@ curves = [
     },
 ]
 
+_curves_by_name = dict((c['name'],c) for c in curves)
+
 
 
 if __name__ == "__main__":
@@ -1393,6 +3033,303 @@ if __name__ == "__main__":
         mulW1 = k*W1
         assert(kW1 == mulW1)
 
+        #on-curve checks: external points only, computed points are valid
+        try:
+            Point(W1.x, W1.y+1, cv)
+            assert False
+        except ECPyException:
+            pass
+        assert(Point(W1.x, W1.y+1, cv, False).y == W1.y+1)
+        try:
+            cv.decode_point([4]+list(W1.x.to_bytes(32,'big'))+list((W1.y+1).to_bytes(32,'big')))
+            assert False
+        except ECPyException:
+            pass
+        for P in (W1+W2, W2+W2, -W1, W1-W2, k*W1, k*G, cv.mul_add(k,G,3,W1),
+                  cv.multi_mul([k,3],[W1,W2]), cv.decode_point(cv.encode_point(W1,True))):
+            assert(isinstance(P,Point) and cv.is_on_curve(P))
+
+        #hashes and interned points: generator pinned, bounded LRU pool
+        assert(hash(W1) == hash(Point(W1.x,W1.y,cv)) and hash(W1) != hash(W2))
+        assert(len(set([W1, Point(W1.x,W1.y,cv), W2])) == 2)
+        assert(cv.intern_point(Point(Gx,Gy,cv)) is cv.generator)
+        pool = cv._interned
+        cv._interned = _InternPool(4)
+        iW1 = cv.intern_point(Point(W1.x,W1.y,cv))
+        assert(cv.intern_point(Point(W1.x,W1.y,cv)) is iW1)
+        for i in range(2,8):
+            assert(cv.intern_point(i*G) == i*G)
+        assert(len(cv._interned) == 4)
+        assert(cv.intern_point(Point(W1.x,W1.y,cv)) is not iW1)
+        assert(cv.intern_point(G) is cv.generator)
+        cv._interned = pool
+
+        #ladder results are secret, and normalized as such
+        pW1 = W1.to_projective()
+        kpW1 = k*pW1
+        assert(kpW1._secret and not pW1._secret)
+        assert((kpW1+pW1)._secret and (pW1-kpW1)._secret and (-kpW1)._secret)
+        assert(kpW1.to_point() == kW1)
+        assert(cv.batch_normalize([kpW1, W2, pW1+W2]) == [kW1, W2, sum_W1_W2])
+        q = cv.field
+        assert(inv_mod(k,q,True) == inv_mod(k,q) == pow(k,q-2,q))
+        assert(batch_inverse([k,0,q-k],q,True) == batch_inverse([k,0,q-k],q))
+        for m in (q, cv.order, 7):
+            vals = [k, 0, 1, m-1, -k, m, 2*m+3, k*k]
+            invs = batch_inverse(vals, m)
+            assert(invs == [inv_mod(v,m) for v in vals])
+            assert(all((v*i)%m == (1 if v%m else 0) for v,i in zip(vals,invs)))
+        assert(batch_inverse([],q) == [] and inv_mod(0,q) == 0)
+
+        #point at infinity, through the generator table and the ladder
+        for P in (G, W1):
+            for k in (0, cv.order, 2*cv.order):
+                try:
+                    k*P
+                    assert False
+                except ECPyException:
+                    pass
+        try:
+            W1 + (-W1)
+            assert False
+        except ECPyException:
+            pass
+
+        #field square roots: p=3 mod 4, Atkin and Tonelli-Shanks
+        for name,method in (('secp256k1',0),('Ed448',0),('secp224k1',1),('Ed25519',1),
+                            ('secp224r1',2)):
+            tc = Curve.get_curve(name)
+            p = tc.field
+            assert(tc._sqrt_method == method)
+            found = set()
+            for e in (1, 2, 3, 4, 5, 6, 7, 11, 1234567, p-1, p-2, (1<<100)+3):
+                if pow(e,(p-1)//2,p) == 1:
+                    for sign in (0,1):
+                        assert(tc._field_sqrt(e,sign) == Curve._sqrt(e,p,sign))
+                    found.add(True)
+                else:
+                    assert(tc._field_sqrt(e) is None and Curve._sqrt(e,p) is None)
+                    found.add(False)
+            assert(len(found) == 2 and tc._field_sqrt(p) == 0)
+            if tc.type == WEIERSTRASS:
+                size = tc.size>>3
+                for e in (1,2,3):
+                    P = e*tc.generator
+                    assert(tc.decode_point(tc.encode_point(P,True)) == P)
+                    assert(tc.decode_point(tc.encode_point(-P,True)) == -P)
+                x = int(1)
+                while tc.y_recover(x) is not None:
+                    x = x+1
+                try:
+                    tc.decode_point([2]+list(x.to_bytes(size,'big'))+[0])
+                    assert False
+                except ECPyException:
+                    pass
+
+        #multi_mul: every forced method agrees with mul_point
+        for e in (1, 0xff, 0x2976F786AE6333E1, cv.order-1):
+            for c in range(1,12):
+                digits = _signed_digits(e, c)
+                assert(sum(d<<(c*i) for i,d in enumerate(digits)) == e)
+                assert(all(-(1<<(c-1)) < d <= 1<<(c-1) for d in digits))
+        assert(Curve._multi_mul_plan(8,256) == ("straus",5))
+        assert(Curve._multi_mul_plan(256,256) == ("pippenger",6))
+        for name in ('secp256k1','secp256r1','Ed25519'):
+            mc = Curve.get_curve(name)
+            n = mc.order
+            es = [3*i+1 for i in range(40)]
+            ks = [(k*0x9e3779b97f4a7c15f39cc0605cedc834)%n - n//2 for k in range(1,41)]
+            es[1] = es[3] = es[0]
+            ks[2] = 0
+            ks[3] = n-ks[0]
+            Ps = [e*mc.generator for e in es]
+            for cnt in (1,3,5,40):
+                ref = (sum(k*e for k,e in zip(ks[:cnt],es))%n)*mc.generator
+                for method in (None,"straus","pippenger","bos-coster"):
+                    assert(mc.multi_mul(ks[:cnt],Ps[:cnt],method) == ref)
+            assert(mc.multi_mul_is_zero([2,-1],[Ps[0],2*Ps[0]],"pippenger"))
+            try:
+                mc.multi_mul([1],[Ps[4]],"foo")
+                assert False
+            except ECPyException:
+                pass
+
+        #fixed base tables: regular recoding for every window width
+        for name in ('secp256k1','Ed25519'):
+            tc = Curve.get_curve(name)
+            n = tc.order
+            P = 7*tc.generator
+            ks = (1, 2, 3, n-1, n+1, 2*n-2, -5, 1<<(n.bit_length()-1), 0x2976F786AE6333E1)
+            ref = [tc.mul_point(k%n,P) for k in ks]
+            for w in range(1,8):
+                table = FixedBaseTable(P, w)
+                assert([table.mul(k) for k in ks] == ref)
+                if name == 'secp256k1':
+                    try:
+                        table.mul(n)
+                        assert False
+                    except ECPyException:
+                        pass
+                else:
+                    O = table.mul(n)
+                    assert(O.x == 0 and O.y == 1)
+
+        #wNAF recoding and variable base multiplication
+        for e in (1, 7, 0xff, 0x2976F786AE6333E1, cv.order-1):
+            for w in range(2,8):
+                naf = _wnaf(e, w)
+                assert(sum(d<<i for i,d in enumerate(naf)) == e)
+                nz = [i for i,d in enumerate(naf) if d]
+                assert(all(naf[i]&1 and abs(naf[i]) < 1<<(w-1) for i in nz))
+                assert(all(j-i >= w for i,j in zip(nz,nz[1:])))
+        for name in ('secp256r1','secp256k1','Ed25519','Ed448'):
+            tc = Curve.get_curve(name)
+            n = tc.order
+            P = 5*tc.generator
+            for e in (1, 2, n-1, n+1, -3, 0x2976F786AE6333E125C0DFFD6C16D37E8CED5ABEDB491BCCA21C75B307D0B318):
+                ref = tc.mul_point(e%n, P)
+                assert(tc.mul_point(e, P, "wnaf") == ref)
+                for w in (2,3,6):
+                    assert(tc._proj_to_point(tc._mul_wnaf(e,P,w)) == ref)
+            try:
+                tc.mul_point(5, P, "foo")
+                assert False
+            except ECPyException:
+                pass
+        tc = Curve.get_curve('secp256r1')
+        try:
+            tc.mul_point(tc.order, 5*tc.generator, "wnaf")
+            assert False
+        except ECPyException:
+            pass
+
+        #joint sparse form and mul_add
+        for a,b in ((0,1),(1,0),(5,3),(0x2976F786AE6333E1,0xC0DFFD6C16D37E8C),
+                    (cv.order-1,cv.order-2)):
+            jsf = _jsf(a,b)
+            assert(sum(u0<<i for i,(u0,u1) in enumerate(jsf)) == a)
+            assert(sum(u1<<i for i,(u0,u1) in enumerate(jsf)) == b)
+            cols = [i for i,(u0,u1) in enumerate(jsf) if u0 or u1]
+            assert(not any(i+1 in cols and i+2 in cols for i in cols))
+        for name in ('secp256r1','secp256k1','Ed25519'):
+            tc = Curve.get_curve(name)
+            n = tc.order
+            G5 = 5*tc.generator
+            G11 = 11*tc.generator
+            for a,b in ((1,1),(0,3),(-7,0),(n-1,n-2),(-0x2976F786AE6333E1,0xC0DFFD6C16D37E8C)):
+                for P,p,Q,q in ((G5,5,G11,11),(G5,5,G5,5),(tc.generator,1,G11,11)):
+                    e = (a*p+b*q)%n
+                    if e:
+                        assert(tc.mul_add(a,P,b,Q) == e*tc.generator)
+            R = tc._mul_add(11,G5,-5,G11)
+            assert(tc._proj_eq(R, tc._proj_zero()))
+
+        #projective points give the same results as points
+        for name in ('secp256r1','Ed25519','Ed448'):
+            tc = Curve.get_curve(name)
+            G = tc.generator
+            A = 3*G
+            B = 8*G
+            pA = A.to_projective()
+            pB = B.to_projective()
+            assert(pA == A and A == pA and not (pA == B))
+            assert((pA+pB).to_point() == 11*G)
+            assert(pA+B == A+pB == A+B)
+            assert(pB-pA == B-pA == pB-A == 5*G)
+            assert(-pA == -A and pA+pA == 6*G)
+            assert(7*pA == 21*G and pA*7 == 21*G)
+            assert((pA.x,pA.y) == (A.x,A.y) and pA.curve is tc)
+            assert(hash(pB+pA) == hash(11*G))
+            assert(pA.serialize() == A.serialize())
+            assert(tc.batch_normalize([pA+pB, A, 2*pB]) == [11*G, A, 16*G])
+            if name == 'secp256r1':
+                assert(pA-A == pB-B)
+                try:
+                    (pA-A).to_point()
+                    assert False
+                except ECPyException:
+                    pass
+            else:
+                O = (pA-A).to_point()
+                assert(O.x == 0 and O.y == 1)
+
+        #mixed additions, affine or Niels second operand
+        for name in ('secp256k1','secp256r1','Ed25519','Ed448'):
+            tc = Curve.get_curve(name)
+            G = tc.generator
+            n = tc.order
+            R = tc._proj_dbl(tc._proj_from(3*G))
+            assert(tc._proj_prep_many([R]) == [tc._point_prep(6*G)])
+            for s in (1, 5, 6, n-6):
+                e = tc._point_prep(s*G)
+                assert(tc._proj_to_point(tc._proj_madd(tc._proj_zero(), e)) == s*G)
+                for S,t in ((tc._proj_madd(R,e),6+s), (tc._proj_madd(R,tc._prep_neg(e)),6-s)):
+                    if t%n:
+                        assert(tc._proj_to_point(S) == (t%n)*G)
+                    else:
+                        assert(tc._proj_eq(S, tc._proj_zero()))
+            if name.startswith('Ed'):
+                x,y = (5*G).x,(5*G).y
+                S = TwistedEdwardCurve._madd_ext(*(R+(x,y,(tc.d*x*y)%tc.field, tc.field,tc.a)))
+                assert(tc._proj_to_point(S) == 11*G)
+
+        #a=0 and a=-3 doublings against the generic one
+        for name,dbl in (('secp256k1',WeierstrassCurve._dbl_jac_a0),
+                         ('secp160k1',WeierstrassCurve._dbl_jac_a0),
+                         ('secp256r1',WeierstrassCurve._dbl_jac_am3),
+                         ('secp521r1',WeierstrassCurve._dbl_jac_am3),
+                         ('Brainpool-p256r1',WeierstrassCurve._dbl_jac)):
+            tc = Curve.get_curve(name)
+            assert(tc._dbl_jac == dbl)
+            R = tc._proj_add(tc._proj_from(3*tc.generator), tc._proj_from(4*tc.generator))
+            for i in range(3):
+                S = tc._proj_dbl(R)
+                assert(tc._proj_eq(S, WeierstrassCurve._dbl_jac(*(R+(tc.field,tc.a)))))
+                R = S
+            assert(tc._proj_to_point(R) == 56*tc.generator)
+            assert(tc._proj_eq(tc._proj_dbl(tc._proj_zero()), tc._proj_zero()))
+
+        #GLV endomorphism and scalar split on the a=0 Koblitz curves
+        for name in ('secp256k1','secp224k1','secp192k1','secp160k1'):
+            tc = Curve.get_curve(name)
+            n = tc.order
+            beta,lam, a1,b1, a2,b2 = tc._glv()
+            assert((a1+b1*lam)%n == 0 and (a2+b2*lam)%n == 0)
+            P = 3*tc.generator
+            lP = tc.mul_point(lam, P)
+            assert(lP.x == (beta*P.x)%tc.field and lP.y == P.y)
+            bound = (n.bit_length()+1)//2 + 1
+            for e in (0, 1, lam, n-1, n//2, (1<<(n.bit_length()-1))+12345,
+                      0x2976F786AE6333E125C0DFFD6C16D37E8CED5ABEDB491BCCA21C75B307D0B318%n):
+                k1,k2 = tc._glv_split(e)
+                assert((k1+k2*lam-e)%n == 0)
+                assert(abs(k1).bit_length() <= bound and abs(k2).bit_length() <= bound)
+                if e:
+                    assert(tc.mul_point(e, P, "wnaf") == tc.mul_point(e, P))
+        for name in ('secp256r1','secp521r1','Brainpool-p256r1'):
+            assert(Curve.get_curve(name)._glv() is None)
+
+        #folding reduction of Mersenne field primes
+        if get_backend() == "python":
+            import pickle
+            tc = Curve.get_curve('secp521r1')
+            q = tc.field
+            p = (1<<521)-1
+            assert(isinstance(q,_MersenneField) and q == p)
+            assert(not isinstance(_field_modulus(2**255-19),_MersenneField))
+            assert(pickle.loads(pickle.dumps(q)) == p)
+            for x in (0, 1, p-1, p, p+1, 2*p+7, (p-1)*(p-1), p*p*p+5, -1, -p-5, 3<<1100):
+                assert(x%q == x%p)
+            R = tc._proj_from(3*tc.generator)
+            G1 = tc._proj_from(tc.generator)
+            for i in range(4):
+                S = WeierstrassCurve._add_jac(*(R+G1+(q,)))
+                assert(S == WeierstrassCurve._add_jac(*(R+G1+(p,))))
+                R = tc._proj_dbl(S)
+                assert(R == WeierstrassCurve._dbl_jac(*(S+(p,tc.a))))
+            assert(tc._proj_to_point(R) == 78*tc.generator)
+        G = cv.generator
+
         #check encoding
         W2_enc = [ 0x04,
                    #x
@@ -1484,6 +3421,104 @@ if __name__ == "__main__":
                    cv)
         mul = k*A
         assert(mul == kA)
+
+        #neutral point, through the generator table and the ladder
+        for P in (B, A):
+            for k in (0, cv.order):
+                O = k*P
+                assert(O.x == 0 and O.y == 1)
+                assert(O+A == A)
+
+        #a=-1 and a=1 formulas against the generic ones
+        for name in ('Ed25519','Ed448'):
+            tc = Curve.get_curve(name)
+            q = tc.field
+            a = tc.a
+            G = tc.generator
+            R = tc._proj_dbl(tc._proj_from(3*G))
+            S = tc._proj_add(tc._proj_from(5*G), tc._proj_from(2*G))
+            assert(tc._dbl_ext != TwistedEdwardCurve._dbl_ext)
+            for T,U in ((tc._dbl_ext(*(R+(q,a))), TwistedEdwardCurve._dbl_ext(*(R+(q,a)))),
+                        (tc._add_ext(*(R+S+(q,a))), TwistedEdwardCurve._add_ext(*(R+S+(q,a)))),
+                        (tc._proj_add(R,S), TwistedEdwardCurve._uadd_ext(*(R+S+(q,a,tc.d)))),
+                        (tc._proj_add(R,R), tc._proj_dbl(R)),
+                        (tc._proj_add(R,tc._proj_zero()), R)):
+                assert(tc._proj_eq(T,U))
+                assert((T[0]*T[1]-T[2]*T[3])%q == 0)
+            assert(tc._proj_to_point(tc._proj_add(R,S)) == 13*G)
+            assert(tc._proj_to_point(tc._add_ext(*(R+S+(q,a)))) == 13*G)
+            assert(tc._proj_to_point(tc._dbl_ext(*(S+(q,a)))) == 14*G)
+
+        #square roots of ratios and point decompression
+        for name in ('Ed25519','Ed448'):
+            tc = Curve.get_curve(name)
+            q = tc.field
+            found = set()
+            for u,v in ((1,1),(0,5),(4,1),(2,3),(3,2),(q-1,1),(q-1,3),(12345,67890),(q-4,9),(7,q-1)):
+                x = tc.sqrt_ratio(u,v)
+                if u and pow(u*inv_mod(v,q),(q-1)//2,q) != 1:
+                    assert(x is None)
+                    found.add(None)
+                else:
+                    assert((v*x*x-u)%q == 0)
+                    if q%8 == 5:
+                        #candidate root before the sqrt(-1) correction
+                        x0 = (u*v**3*pow(u*v**7,(q-5)//8,q))%q
+                        found.add((v*x0*x0-u)%q == 0)
+            assert(None in found and (len(found) == 3 or q%8 != 5))
+            for e in (1, 2, 3, 1000, tc.order-1):
+                P = e*tc.generator
+                assert(tc.x_recover(P.y, P.x&1) == P.x)
+                assert(tc.x_recover(P.y, 1-(P.x&1)) == q-P.x)
+                assert(tc.decode_point(tc.encode_point(P), cache=False) == P)
+            y = int(2)
+            while tc.x_recover(y) is not None:
+                y = y+1
+            size = tc._coord_size()
+            assert(tc.x_recover(1) == 0 and tc.x_recover(1,1) is None)
+            for eP in (y.to_bytes(size,'little'), int(q).to_bytes(size,'little'),
+                       int(1|(1<<(8*size-1))).to_bytes(size,'little')):
+                try:
+                    tc.decode_point(eP, cache=False)
+                    assert False
+                except ECPyException:
+                    pass
+
+        #decode cache: LRU eviction, invalid encodings are not cached
+        for name in ('Ed25519','secp256k1'):
+            tc = Curve.get_curve(name)
+            assert(tc.decode_cache is None)
+            dc = tc.set_decode_cache(2)
+            assert(tc.decode_cache is dc)
+            eP = [tc.encode_point(e*tc.generator) for e in (1,2,3)]
+            P1 = tc.decode_point(eP[0])
+            P2 = tc.decode_point(eP[1])
+            assert(tc.decode_point(bytes(bytearray(eP[0]))) is P1)
+            assert(tc.decode_point(eP[2]) == 3*tc.generator)
+            assert(len(dc) == 2 and (dc.hits,dc.misses) == (1,3))
+            assert(tc.decode_point(eP[0]) is P1)
+            assert(tc.decode_point(eP[1]) is not P2)
+            assert(tc.decode_point(eP[0],cache=False) is not P1)
+            assert((dc.hits,dc.misses) == (2,4))
+            if name == 'Ed25519':
+                bad = int(tc.field).to_bytes(32,'little')
+            else:
+                bad = [4]+[0xff]*64
+            for i in range(2):
+                try:
+                    tc.decode_point(bad)
+                    assert False
+                except ECPyException:
+                    pass
+            assert(len(dc) == 2 and dc.misses == 6)
+            dc.clear()
+            assert(len(dc) == 0 and (dc.hits,dc.misses) == (0,0))
+            assert(tc.set_decode_cache(0) is None and tc.decode_cache is None)
+        try:
+            DecodeCache(0)
+            assert False
+        except ECPyException:
+            pass
         
 
         ##################################
@@ -1527,6 +3562,69 @@ if __name__ == "__main__":
         assert(ekP == eQ)
 
 
+        ##############################
+        ### Curve registry         ###
+        ##############################
+        for name in ('secp256k1','secp521r1','Brainpool-p256r1','Ed25519','Curve25519'):
+            tc = Curve.get_curve(name)
+            assert(Curve.get_curve(name) is tc and tc.name == name)
+            for key,value in tc._domain.items():
+                assert(getattr(tc,key) is value)
+            assert(tc.generator.curve is tc)
+            assert(name in Curve.get_curve_names())
+        assert(Curve.get_curve('foo') is None)
+
+        ##############################
+        ### Big integer backends   ###
+        ##############################
+        backend = get_backend()
+        try:
+            set_backend("foo")
+            assert False
+        except ECPyException:
+            pass
+        assert(get_backend() == backend)
+
+        def backend_results():
+            out = []
+            for name in ('secp256k1','secp521r1','Ed25519','Ed448'):
+                tc = Curve.get_curve(name)
+                G = tc.generator
+                P = 3*G
+                out.append((tc.mul_point(k,P), tc.mul_point(k,P,"wnaf"),
+                            tc.mul_add(k,G,-k,P), tc.multi_mul([k,5,-7],[P,G,P])))
+            for name in ('secp256r1','secp224r1','Ed25519','Ed448'):
+                tc = Curve.get_curve(name)
+                P = 3*tc.generator
+                if name.startswith('secp'):
+                    eP = tc.encode_point(P,True)
+                else:
+                    eP = tc.encode_point(P)
+                out.append((tc.decode_point(eP),))
+            tc = Curve.get_curve('Curve25519')
+            out.append((tc.mul_point(k, tc.generator).x,))
+            return out
+
+        set_backend("python")
+        ref = backend_results()
+        if gmpy2 is None:
+            try:
+                set_backend("gmpy2")
+                assert False
+            except ECPyException:
+                pass
+        else:
+            tc = Curve.get_curve('secp256k1')
+            set_backend("gmpy2")
+            assert(get_backend() == "gmpy2")
+            assert(Curve.get_curve('secp256k1') is not tc)
+            assert(type(Curve.get_curve('secp256k1').field) is type(gmpy2.mpz(1)))
+            res = backend_results()
+            assert(res == ref)
+            assert(all(isinstance(P.x,int) and isinstance(P.y,int)
+                       for r in res[:-1] for P in r))
+            assert(isinstance(res[-1][0],int))
+        set_backend(backend)
 
 
         ##OK!
@@ -15,9 +15,10 @@
 #python 2 compatibility
 from builtins import int,pow
 
-from ecpy.curves     import Curve,Point
+from ecpy.curves     import Curve,Point,ECPyException,inv_mod
 from ecpy.keys       import ECPublicKey, ECPrivateKey
 from ecpy.formatters import decode_sig, encode_sig
+from ecpy.batch      import batch_verify
 from ecpy            import ecrand
 
 import hashlib
@@ -86,7 +87,7 @@ class ECDSA:
         msg = int.from_bytes(msg, 'big')
         
         Q = G*k
-        kinv = pow(k,n-2,n)
+        kinv = inv_mod(k,n,True)
         r = Q.x % n
         if r == 0:
             return None
@@ -124,25 +125,78 @@ class ECDSA:
         G     = curve.generator
 
         r,s = decode_sig(sig, self.fmt)
-        if (r == None or
-            r > n     or
-            s > n     ) :
+        if (r == None      or
+            not 0 < r < n  or
+            not 0 < s < n  ) :
             return False
 
         h = int.from_bytes(msg,'big')
 
-        c   = pow(s, n-2, n)
+        c   = inv_mod(s, n)
         u1  = (h*c)%n
         u2  = (r*c)%n
-        u1G = u1*G
-        u2Q = u2*pu_key.W
-        GQ  =  u1G+u2Q
+        try:
+            GQ = curve.mul_add(u1, G, u2, pu_key.W)
+        except ECPyException:
+            #point at infinity
+            return False
         x   = GQ.x % n
 
         return x == r
 
+    def verify_batch(self, items):
+        """ Verifies several message signatures at once.
+
+        Each R_i, such as x(R_i) = r_i, is recovered from its recovery id.
+        The equations u1_i*G + u2_i*Q_i - R_i = 0 are combined with random
+        weights into one check, see :func:`ecpy.batch.combined_check`. If the
+        combination fails, the batch is bisected to locate the bad signatures.
+
+        The recovery id, as returned by Bitcoin compact or Ethereum
+        signatures, gives the parity of R_i.y in bit 0 and x(R_i) = r_i+n
+        in bit 1. Items without recovery id, with a malformed signature or
+        on a curve with a cofactor are verified one by one: there is no
+        way to combine them as the sign of R_i is unknown.
+
+        Args:
+            items (list): (msg, sig, pu_key) or (msg, sig, pu_key, recid) tuples
+
+        Returns:
+            list : one boolean per item, as returned by :func:`verify`
+        """
+        return batch_verify(items, lambda item: self._batch_term(*item),
+                            self._batch_equation,
+                            lambda item: self.verify(*item[:3]))
+
+    def _batch_term(self, msg, sig, pu_key, recid=None):
+        curve = pu_key.curve
+        if recid is None or curve.cofactor != 1:
+            return None
+        n = curve.order
+        r,s = decode_sig(sig, self.fmt)
+        if (r == None or
+            not 0 < r < n or
+            not 0 < s < n):
+            return None
+        x = r+n if recid & 2 else r
+        if x >= curve.field:
+            return None
+        y = curve.y_recover(x, recid & 1)
+        if y is None:
+            return None
+        h = int.from_bytes(msg,'big')
+        c = inv_mod(s,n)
+        return (curve, h*c%n, r*c%n, pu_key.W, Point(x,y,curve))
+
+    @staticmethod
+    def _batch_equation(term):
+        # u1*G + u2*Q - R
+        curve,u1,u2,Q,R = term
+        return [(u1,curve.generator), (u2,Q), (-1,R)]
+
     
 if __name__ == "__main__":
+    import random
     try:
         ### ECDSA
         cv     = Curve.get_curve('secp256k1')
@@ -202,7 +256,39 @@ if __name__ == "__main__":
         #sign with krfc
         sig = signer.sign_rfc6979(msg,pv_key,hashlib.sha256)
         assert(sig == expected_sig)
-        
+
+        #out of range r,s and u1*G+u2*Q at infinity
+        n = cv.order
+        tsigner = ECDSA("ITUPLE")
+        for r,s in ((5,0),(0,0),(0,5),(n,n),(n,1),(1,n),(n+1,1)):
+            assert(not tsigner.verify(msg,(r,s),pu_key))
+        r = 12345
+        h = (-r*pv_key.d)%n
+        assert(not tsigner.verify(h.to_bytes(32,'big'),(r,1),pu_key))
+
+        #batch verification
+        for name in ('secp256k1','secp256r1'):
+            cv = Curve.get_curve(name)
+            items = []
+            for i in range(12):
+                pv = ECPrivateKey(random.randrange(1,cv.order), cv)
+                msg = hashlib.sha256(b'batch %d'%i).digest()
+                k = random.randrange(1,cv.order)
+                R = k*cv.generator
+                sig = signer.sign_k(msg, pv, k)
+                if decode_sig(sig)[0] != R.x:
+                    continue
+                items.append((msg, sig, pv.get_public_key(), R.y&1))
+            items[3] = items[3][:3]+(items[3][3]^1,)
+            items[4] = items[4][:3]
+            assert(signer.verify_batch(items) == [True]*len(items))
+            items[1] = (items[2][0],)+items[1][1:]
+            items[5] = items[5][:2]+(items[0][2],items[5][3])
+            expect = [signer.verify(*it[:3]) for it in items]
+            assert(expect.count(False) == 2)
+            assert(signer.verify_batch(items) == expect)
+        assert signer.verify_batch([]) == []
+
         ##OK!
         print("All internal assert OK!")
     finally:
@@ -18,6 +18,7 @@ from builtins import int,pow
 from ecpy.curves     import Curve,Point
 from ecpy.keys       import ECPublicKey, ECPrivateKey
 from ecpy.formatters import decode_sig, encode_sig, list_formats
+from ecpy.batch      import batch_verify
 from ecpy            import ecrand
 from ecpy.curves     import ECPyException
 
@@ -31,7 +32,7 @@ def _jacobi(n, k):
     t = 1
     while n != 0:
         while n % 2 == 0:
-            n = n / 2
+            n = n // 2
             r = k % 8
             if r == 3 or r == 5:
                 t = -t
@@ -135,6 +136,11 @@ class ECSchnorr:
         3. If Q = O (the neutral point), return 0;
         4. r' = H(Q, kpub, m) [CME: mod n according to pdf/code, according to code), Q and kpub compressed "02|03 x"]
         5. return r' == r
+    - "SECP256K1":
+        1. e = H(r || compressed(W) || m) mod n
+        2. R = [s]G - [e]W
+           Signature is invalid if R's y coordinate is not a quadratic residue.
+        3. Signature is valid if R's x coordinate equals r.
 
     Default is "ISO"
     
@@ -328,64 +334,131 @@ class ECSchnorr:
             s > n-1     ) :
             return False
         hasher = self._hasher()
-        if self.option == "ISO":
-            sG = s * G
-            rW = r*pu_key.W
-            Q = sG - rW            
-            xQ = Q.x.to_bytes(size,'big')
-            yQ = Q.y.to_bytes(size,'big')
-            hasher.update(xQ+yQ+msg)
-            v = hasher.digest()
-            v = int.from_bytes(v,'big')
+        try:
+            if self.option == "ISO":
+                Q = curve.mul_add(s, G, -r, pu_key.W)
+                xQ = Q.x.to_bytes(size,'big')
+                yQ = Q.y.to_bytes(size,'big')
+                hasher.update(xQ+yQ+msg)
+                v = hasher.digest()
+                v = int.from_bytes(v,'big')
              
-        elif self.option == "ISOx":
-            sG = s * G
-            rW = r*pu_key.W
-            Q = sG - rW   
-            xQ = Q.x.to_bytes(size,'big')
-            hasher.update(xQ+msg)
-            v = hasher.digest()
-            v = int.from_bytes(v,'big')
+            elif self.option == "ISOx":
+                Q = curve.mul_add(s, G, -r, pu_key.W)
+                xQ = Q.x.to_bytes(size,'big')
+                hasher.update(xQ+msg)
+                v = hasher.digest()
+                v = int.from_bytes(v,'big')
             
-        elif self.option == "BSI":
-            sG = s * G
-            rW = r*pu_key.W
-            Q = sG + rW   
-            xQ = (Q.x).to_bytes(size,'big')
-            hasher.update(msg+xQ)
-            v = hasher.digest()
-            v = int.from_bytes(v,'big')
+            elif self.option == "BSI":
+                Q = curve.mul_add(s, G, r, pu_key.W)
+                xQ = (Q.x).to_bytes(size,'big')
+                hasher.update(msg+xQ)
+                v = hasher.digest()
+                v = int.from_bytes(v,'big')
+
+            elif self.option == "LIBSECP":
+                rb = r.to_bytes(size,'big') 
+                hasher.update(rb+msg)
+                h = hasher.digest()
+                h = int.from_bytes(h,'big')
+                if h == 0 or h > n :
+                    return 0
+                R = curve.mul_add(s, G, h, pu_key.W)
+                v = R.x % n
+
+            elif self.option == "Z":
+                Q = curve.mul_add(s, G, r, pu_key.W)
+                if Q.y & 1:
+                    xQ = b'\x03'+Q.x.to_bytes(size,'big')
+                else :
+                    xQ = b'\x02'+Q.x.to_bytes(size,'big')
+                if pu_key.W.y & 1:
+                    xPub = b'\x03'+pu_key.W.x.to_bytes(size,'big')
+                else :
+                    xPub = b'\x02'+pu_key.W.x.to_bytes(size,'big')
+                hasher.update(xQ+xPub+msg)
+                v = hasher.digest()
+                v = int.from_bytes(v,'big')
+                v = v%n
+
+            elif self.option == "SECP256K1":
+                rb = r.to_bytes(size,'big')
+                hasher.update(rb+pu_key.W.serialize()+msg)
+                e = hasher.digest()
+                e = int.from_bytes(e,'big') % n
+                R = curve.mul_add(s, G, -e, pu_key.W)
+                if _jacobi(R.y, curve.field) != 1:
+                    return False
+                v = R.x % n
+        except ECPyException:
+            #point at infinity
+            return False
 
-        elif self.option == "LIBSECP":
-            rb = r.to_bytes(size,'big') 
-            hasher.update(rb+msg)
-            h = hasher.digest()
-            h = int.from_bytes(h,'big')
-            if h == 0 or h > n :
-                return 0
-            sG = s * G
-            hW = h*pu_key.W
-            R = sG + hW
-            v = R.x % n
+        return v == r
 
-        elif self.option == "Z":
-            sG = s * G
-            rW = r*pu_key.W
-            Q = sG + rW
-            if Q.y & 1:
-                xQ = b'\x03'+Q.x.to_bytes(size,'big')
-            else :
-                xQ = b'\x02'+Q.x.to_bytes(size,'big')
-            if pu_key.W.y & 1:
-                xPub = b'\x03'+pu_key.W.x.to_bytes(size,'big')
-            else :
-                xPub = b'\x02'+pu_key.W.x.to_bytes(size,'big')
-            hasher.update(xQ+xPub+msg)
-            v = hasher.digest()
-            v = int.from_bytes(v,'big')
-            v = v%n
+    def verify_batch(self, items):
+        """ Verifies several message signatures at once.
 
-        return v == r
+        With the "LIBSECP" and "SECP256K1" options, R is recoverable from r:
+        its x coordinate is r and its y coordinate is respectively even or
+        a quadratic residue. The equations s_i*G + h_i*W_i - R_i = 0 are
+        then combined with random weights into one check, with a single G
+        coefficient, as in BIP340 batch verification, see
+        :func:`ecpy.batch.combined_check`. If the combination fails, the
+        batch is bisected to locate the bad signatures.
+
+        Other options, where r is a hash, and signatures not fulfilling the
+        above constraints are verified one by one.
+
+        Args:
+            items (list): (msg, sig, pu_key) tuples
+
+        Returns:
+            list : one boolean per item, as returned by :func:`verify`
+        """
+        if self.option not in ("LIBSECP","SECP256K1"):
+            return [self.verify(*item) for item in items]
+        return batch_verify(items, lambda item: self._batch_term(*item),
+                            self._batch_equation,
+                            lambda item: self.verify(*item))
+
+    def _batch_term(self, msg, sig, pu_key):
+        curve = pu_key.curve
+        if curve.cofactor != 1:
+            return None
+        n    = curve.order
+        p    = curve.field
+        size = curve.size>>3
+        r,s = decode_sig(sig, self.fmt)
+        if (r == None or
+            r >= n    or
+            s == 0    or
+            s > n-1   ):
+            return None
+        hasher = self._hasher()
+        rb = r.to_bytes(size,'big')
+        if self.option == "LIBSECP":
+            hasher.update(rb+msg)
+            h = int.from_bytes(hasher.digest(),'big')
+            if h == 0 or h >= n:
+                return None
+            y = curve.y_recover(r, 0)
+        else:
+            hasher.update(rb+pu_key.W.serialize()+msg)
+            h = -int.from_bytes(hasher.digest(),'big') % n
+            y = curve.y_recover(r)
+            if y is not None and _jacobi(y, p) != 1:
+                y = p-y
+        if y is None:
+            return None
+        return (curve, s, h, pu_key.W, Point(r,y,curve))
+
+    @staticmethod
+    def _batch_equation(term):
+        # s*G + h*W - R
+        curve,s,h,W,R = term
+        return [(s,curve.generator), (h,W), (-1,R)]
  
 if __name__ == "__main__":
     import sys
@@ -459,6 +532,27 @@ if __name__ == "__main__":
         assert(expect_r == sig[0])
         assert(expect_s == sig[1])
         assert(signer.verify(msg,sig,pu_key))
+
+        ##batch verification
+        for option in ("LIBSECP","SECP256K1","ISOx"):
+            signer = ECSchnorr(hashlib.sha256,option,"ITUPLE")
+            items = []
+            for i in range(10):
+                pv = ECPrivateKey(ecrand.rnd(cv.order), cv)
+                msg = hashlib.sha256(b'batch %d'%i).digest()
+                items.append((msg, signer.sign(msg,pv), pv.get_public_key()))
+            items.append((msg, signer.sign(msg,pv), pv.get_public_key()))
+            assert(signer.verify_batch(items) == [True]*len(items))
+            items[2] = (items[3][0],)+items[2][1:]
+            items[6] = items[6][:2]+(items[0][2],)
+            expect = [signer.verify(*it) for it in items]
+            assert(expect.count(False) == 2)
+            assert(signer.verify_batch(items) == expect)
+
+        #s*G - r*W at infinity
+        signer = ECSchnorr(hashlib.sha256,"ISOx","ITUPLE")
+        r = 12345
+        assert(not signer.verify(msg, (r, (r*pv.d)%cv.order), pv.get_public_key()))
         
         # ##OK!
         print("All internal assert OK!")
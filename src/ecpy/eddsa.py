@@ -17,9 +17,10 @@
 from builtins import int,pow
 
 import binascii
-from ecpy.curves import Curve,Point
+from ecpy.curves import Curve,Point,ECPyException
 from ecpy.keys import ECPublicKey, ECPrivateKey
 from ecpy.formatters import decode_sig, encode_sig
+from ecpy.batch      import batch_verify, combined_check
 import hashlib
 
 class EDDSA:
@@ -170,26 +171,35 @@ class EDDSA:
         eR = int.from_bytes(eR,'little')
         return encode_sig(eR,S,self.fmt,size)
     
-    def verify(self,msg,sig,pu_key):
+    def verify(self,msg,sig,pu_key,cofactored=False):
         """ Verifies a message signature.                
 
+        The cofactorless check is S*B - h*A == R. The cofactored one,
+        allowed by RFC 8032, is c*(S*B - h*A - R) == 0, c being the curve
+        cofactor: it also accepts signatures whose R or A have a small
+        order component.
+
         Args:
             msg (bytes)                   : the message to verify the signature
             sig (bytes)                   : signature to verify
             pu_key (ecpy.keys.ECPublicKey): key to use for verifying
+            cofactored (bool)             : cofactored or cofactorless check
         """
-        curve = pu_key.curve
-        n     = curve.order
-        size  = curve._coord_size()
-
-        eR,S = decode_sig(sig, self.fmt)
-
-        #left
-        eR = eR.to_bytes(size,'little')
-        R  = curve.decode_point(eR)
+        term = self._verify_term(msg, sig, pu_key)
+        if term is None:
+            return False
+        if cofactored:
+            return combined_check(term[0], [term], self._verify_equation)
+        curve,S,h,A,R = term
+        # R + h*A == S*B  <=>  S*B - h*A == R
+        SB_hA = curve.mul_add(S, curve.generator, -h, A)
         
+        return SB_hA == R
+
+    def _challenge(self, curve, eR, A, msg):
+        """ Returns H(eR || eA || msg) mod n """
         hasher = self._hasher()
-        eA = curve.encode_point(pu_key.W)
+        eA = curve.encode_point(A)
         if curve.name =='Ed448':
             hasher.update(b'SigEd448\x00\x00')
             hasher.update(eR)
@@ -205,14 +215,59 @@ class EDDSA:
             assert False, '%s not supported'%curve.name
     
         h = int.from_bytes(h,'little')
-        h = h%n
-        A = pu_key.W        
-        left  = R+h*A
+        return h%curve.order
 
-        #right
-        right = S*curve.generator
-        
-        return left == right
+    def verify_batch(self, items, cofactored=False):
+        """ Verifies several message signatures at once.
+
+        Each result is the one of :func:`verify` in the same mode, both
+        being cofactorless by default.
+
+        With `cofactored`, the equations
+        c*(S_i*B - h_i*A_i - R_i) = 0 are combined with random weights z_i
+        into one check, see :func:`ecpy.batch.combined_check`:
+
+            c*((sum z_i*S_i)*B - sum (z_i*h_i)*A_i - sum z_i*R_i) = 0
+
+        If the combination fails, the batch is bisected to locate the bad
+        signatures.
+
+        Cofactorless equations cannot be combined: small order components
+        of crafted signatures could cancel each other. Without
+        `cofactored`, signatures are therefore verified one by one: pass
+        `cofactored=True` to get the batch speed up.
+
+        Args:
+            items (list): (msg, sig, pu_key) tuples
+            cofactored (bool): cofactored or cofactorless verification
+
+        Returns:
+            list : one boolean per item
+        """
+        if not cofactored:
+            return [self.verify(*item) for item in items]
+        return batch_verify(items, lambda item: self._verify_term(*item),
+                            self._verify_equation,
+                            lambda item: self.verify(*item, cofactored=True))
+
+    def _verify_term(self, msg, sig, pu_key):
+        curve = pu_key.curve
+        size  = curve._coord_size()
+        eR,S = decode_sig(sig, self.fmt)
+        eR = eR.to_bytes(size,'little')
+        try:
+            R = curve.decode_point(eR, cache=False)
+        except ECPyException:
+            return None
+        h = self._challenge(curve, eR, pu_key.W, msg)
+        return (curve, S, h, pu_key.W, R)
+
+    @staticmethod
+    def _verify_equation(term):
+        # c*(S*B - h*A - R), c being the cofactor
+        curve,S,h,A,R = term
+        c = curve.cofactor
+        return [(c*S,curve.generator), (-c*h,A), (-c,R)]
 
 
     
@@ -330,7 +385,61 @@ if __name__ == "__main__":
         assert(signer.verify(msg,sig,pu_key))
         assert(sig == expected_sig)
 
-        
+        #batch verification
+        import os
+        batch_curves = [('Ed25519',hashlib.sha512,None)]
+        if hasattr(hashlib,'shake_256'):
+            batch_curves.append(('Ed448',hashlib.shake_256,114))
+        for name,hasher,hash_len in batch_curves:
+            cv = Curve.get_curve(name)
+            signer = EDDSA(hasher,hash_len)
+            items = []
+            for i in range(8):
+                pv = ECPrivateKey(int.from_bytes(os.urandom(cv._coord_size()),'big'), cv)
+                pu = EDDSA.get_public_key(pv, hasher, hash_len)
+                msg = b'batch %d'%i
+                items.append((msg, signer.sign(msg,pv), pu))
+            items.append((msg, signer.sign(msg,pv), pu))
+            assert(signer.verify_batch(items) == [True]*len(items))
+            assert(signer.verify_batch(items,True) == [True]*len(items))
+            bad = list(items)
+            bad[2] = (items[3][0],)+items[2][1:]
+            bad[6] = items[6][:2]+(items[0][2],)
+            expect = [signer.verify(*it) for it in bad]
+            assert(expect.count(False) == 2)
+            assert(signer.verify_batch(bad) == expect)
+            assert(signer.verify_batch(bad,True) == expect)
+            #R not on the curve, or not canonical
+            for eR in (int(2), int(2**(8*cv._coord_size()-1)-1)):
+                sig = encode_sig(eR, int(1), signer.fmt, cv._coord_size())
+                assert not signer.verify(msg, sig, pu)
+                for cofactored in (False, True):
+                    assert signer.verify_batch(items[:3]+[(msg,sig,pu)], cofactored) == [True]*3+[False]
+
+        #R with an order 8 component: only cofactored verification accepts
+        cv = Curve.get_curve('Ed25519')
+        signer = EDDSA(hashlib.sha512)
+        T = None
+        while T is None:
+            try:
+                P = cv.decode_point(os.urandom(32), cache=False)
+            except Exception:
+                continue
+            T = cv.order*P
+            if not getattr(T,'_x',0) or not getattr(T,'_y',0):
+                T = None
+        a,A,prefix = EDDSA._get_materials(pv_key)
+        r = 12345
+        R = r*cv.generator + T
+        eR = bytes(cv.encode_point(R))
+        h = signer._challenge(cv, eR, A, msg)
+        S = (r + h*a)%cv.order
+        sig = encode_sig(int.from_bytes(eR,'little'), S, signer.fmt, 32)
+        items = [(msg, signer.sign(msg,pv_key), pu_key), (msg, sig, pu_key)]
+        assert not signer.verify(msg, sig, pu_key)
+        assert signer.verify(msg, sig, pu_key, cofactored=True)
+        assert signer.verify_batch(items) == [True, False]
+        assert signer.verify_batch(items, True) == [True, True]
 
         ##OK!
         print("All internal assert OK!")
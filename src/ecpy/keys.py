@@ -22,6 +22,8 @@ class ECPublicKey:
     
     Can be used for both ECDSA and EDDSA signature
 
+    Public keys are hashable and compare equal when their points do.
+
     Attributes:
         W (Point): public key point
 
@@ -32,6 +34,15 @@ class ECPublicKey:
     def __init__(self, W):
         self.W = W
 
+    def __eq__(self, other):
+        return isinstance(other, ECPublicKey) and self.W == other.W
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.W)
+
     @property
     def curve(self):
         return self.W.curve
@@ -0,0 +1,199 @@
+# Copyright 2016 Cedric Mesnil <cedric.mesnil@ubinity.com>, Ubinity SAS
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Multi-process batch signing and verification.
+
+Arithmetic in ecpy is pure Python, so a single process is bound to one
+core. :func:`verify_many` and :func:`sign_many` shard a batch over a
+:class:`concurrent.futures.ProcessPoolExecutor` and return the results in
+input order.
+
+Keys travel to the workers as (curve name, coordinates) tuples: each
+worker process looks the curve up with :func:`Curve.get_curve` and keeps
+it, with its precomputed tables, for all the jobs it runs. Only named
+curves can therefore be used.
+
+Signers (:class:`ecpy.ecdsa.ECDSA`, :class:`ecpy.eddsa.EDDSA`,
+:class:`ecpy.ecschnorr.ECSchnorr`) are sent as is, so their hasher must be
+picklable (``hashlib.sha256`` and friends are).
+
+To keep the workers, and their curves, alive across calls create a pool
+once with :func:`make_pool` and pass it as `executor`.
+"""
+
+#python 2 compatibility
+from builtins import int,pow
+
+import concurrent.futures
+import os
+import random
+
+from ecpy.curves import Curve, ECPyException, _trusted_point
+from ecpy.keys import ECPublicKey, ECPrivateKey
+
+
+def _pack_key(key):
+    if isinstance(key, ECPublicKey):
+        curve = key.W.curve
+        k = (0, curve.name, getattr(key.W,'_x',0), getattr(key.W,'_y',0))
+    elif isinstance(key, ECPrivateKey):
+        curve = key.curve
+        k = (1, curve.name, key.d)
+    else:
+        raise ECPyException('unsupported key type')
+    if Curve.get_curve(curve.name) is None:
+        raise ECPyException('curve %s is not a named curve'%curve.name)
+    return k
+
+def _unpack_key(k):
+    curve = Curve.get_curve(k[1])
+    if k[0] == 0:
+        return ECPublicKey(_trusted_point(k[2], k[3], curve))
+    return ECPrivateKey(k[2], curve)
+
+def _init_worker(names):
+    # never share the nonce generator state with the parent
+    random.seed()
+    for name in names:
+        Curve.get_curve(name)
+
+def _verify_chunk(signer, chunk):
+    return [signer.verify(msg, sig, _unpack_key(k)) for msg,sig,k in chunk]
+
+def _sign_chunk(signer, chunk):
+    return [signer.sign(msg, _unpack_key(k)) for msg,k in chunk]
+
+
+def make_pool(workers=None, curves=()):
+    """ Returns a process pool suitable for :func:`verify_many` and :func:`sign_many`.
+
+    Args:
+        workers (int):  number of processes, default to the number of CPUs
+        curves (list):  names of curves to load in each worker at start up
+
+    Returns:
+        ProcessPoolExecutor: the pool, to be shut down by the caller
+    """
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                  initializer=_init_worker,
+                                                  initargs=(tuple(curves),))
+
+def _run(job, signer, items, workers, executor, chunksize):
+    n = len(items)
+    if n == 0:
+        return []
+    if executor is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            return job(signer, items)
+    else:
+        workers = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-n//(4*workers)))
+    chunks = [items[i:i+chunksize] for i in range(0, n, chunksize)]
+
+    own = executor is None
+    if own:
+        names = set(item[-1][1] for item in items)
+        executor = make_pool(min(workers, len(chunks)), names)
+    futures = []
+    try:
+        for c in chunks:
+            futures.append(executor.submit(job, signer, c))
+        res = []
+        for f in futures:
+            res.extend(f.result())
+        return res
+    except BaseException:
+        for f in futures:
+            f.cancel()
+        raise
+    finally:
+        if own:
+            executor.shutdown(wait=True)
+
+def verify_many(signer, items, workers=None, executor=None, chunksize=None):
+    """ Verifies a batch of signatures on several processes.
+
+    Each result is the one of `signer.verify(msg, sig, pu_key)`.
+
+    Args:
+        signer:              ECDSA, EDDSA or ECSchnorr instance
+        items (list):        (msg, sig, pu_key) tuples
+        workers (int):       number of processes when no executor is given,
+                             default to the number of CPUs. 1 runs in process.
+        executor:            pool returned by :func:`make_pool`, kept open
+        chunksize (int):     number of items per job
+
+    Returns:
+        list: verification results, in `items` order
+    """
+    items = [(msg, sig, _pack_key(pu_key)) for msg,sig,pu_key in items]
+    return _run(_verify_chunk, signer, items, workers, executor, chunksize)
+
+def sign_many(signer, items, workers=None, executor=None, chunksize=None):
+    """ Signs a batch of messages on several processes.
+
+    Each result is the one of `signer.sign(msg, pv_key)`.
+
+    Args:
+        signer:              ECDSA, EDDSA or ECSchnorr instance
+        items (list):        (msg, pv_key) tuples
+        workers (int):       number of processes when no executor is given,
+                             default to the number of CPUs. 1 runs in process.
+        executor:            pool returned by :func:`make_pool`, kept open
+        chunksize (int):     number of items per job
+
+    Returns:
+        list: signatures, in `items` order
+    """
+    items = [(msg, _pack_key(pv_key)) for msg,pv_key in items]
+    return _run(_sign_chunk, signer, items, workers, executor, chunksize)
+
+
+if __name__ == "__main__":
+    import hashlib
+    from ecpy.ecdsa import ECDSA
+    from ecpy.eddsa import EDDSA
+    from ecpy.ecschnorr import ECSchnorr
+
+    try:
+        cv = Curve.get_curve('secp256k1')
+        pv = [ECPrivateKey(random.randrange(1,cv.order), cv) for i in range(16)]
+        msgs = [hashlib.sha256(b'msg %d'%i).digest() for i in range(16)]
+
+        for signer in (ECDSA(), ECSchnorr(hashlib.sha256)):
+            sigs = sign_many(signer, list(zip(msgs,pv)), workers=2, chunksize=3)
+            assert len(set(sigs)) == len(sigs)
+            pu = [k.get_public_key() for k in pv]
+            items = list(zip(msgs, sigs, pu))
+            items[5] = (msgs[6], sigs[5], pu[5])
+            expect = [signer.verify(*it) for it in items]
+            assert expect.count(False) == 1
+            assert verify_many(signer, items, workers=2) == expect
+            assert verify_many(signer, items, workers=1) == expect
+
+        cv = Curve.get_curve('Ed25519')
+        signer = EDDSA(hashlib.sha512)
+        pv = [ECPrivateKey(random.getrandbits(256), cv) for i in range(8)]
+        pu = [EDDSA.get_public_key(k) for k in pv]
+        with make_pool(2, ['Ed25519']) as pool:
+            sigs = sign_many(signer, list(zip(msgs,pv)), executor=pool)
+            assert sigs == [signer.sign(m,k) for m,k in zip(msgs,pv)]
+            assert all(verify_many(signer, list(zip(msgs,sigs,pu)), executor=pool))
+
+        print("All internal assert OK!")
+    finally:
+        pass